@@ -1,166 +1,447 @@
+import argparse
+import hashlib
 import json
 import os
 import time
-import random
-from datetime import datetime, timezone
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor
 
-from bs4 import BeautifulSoup
-from dateutil.parser import parse as dtparse
 from tqdm import tqdm
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import InvalidSessionIdException, WebDriverException
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import InvalidSessionIdException, TimeoutException, WebDriverException
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from browser_session import MAX_PAGES, MAX_RSS_MB, BrowserSession
+from corpus_storage import CORPUS_DIR, JsonlWriter, ShardedCorpusWriter
+from fetch_meta import META_DB, FetchMetaStore, body_hash
+from html_parsing import DEFAULT_BACKEND, available_backends, parse_article_html
+from http_fetcher import HttpFetcher
+from pipeline import Pipeline, Stage
+from rate_limiter import HostRateLimiter
+from scraper_metrics import ScraperMetrics
+from url_frontier import SKIPPED, UrlFrontier
 
 
 URLS_FILE = "urls_auto.txt"
 OUT_FILE = "src/storage/data_auto.jsonl"
 MIN_CHARS = 400
 TARGET_DOCS = 6000
+PAGE_TIMEOUT = 15.0
+ARTICLE_TIMEOUT = 5.0
 
 
-def setup_driver():
-    options = webdriver.ChromeOptions()
-    options.add_argument("--start-maximized")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-    return driver
-
-
-def parse_article_html(html: str, url: str, min_chars: int):
-    soup = BeautifulSoup(html, "html.parser")
-
-    title_tag = soup.find("h1")
-    if not title_tag:
-        title_tag = soup.find("title")
-    title = title_tag.get_text(strip=True) if title_tag else None
-
-    date = None
-    time_tag = soup.find("time")
-    if time_tag:
-        raw = time_tag.get("datetime") or time_tag.get_text(strip=True)
-        try:
-            date = dtparse(raw).isoformat()
-        except Exception:
-            date = raw
-
-    category = None
-    meta_section = soup.find("meta", attrs={"property": "article:section"})
-    if meta_section:
-        category = meta_section.get("content")
-
-    text = soup.get_text(" ", strip=True)
-
-    if not text or len(text) < min_chars:
-        return None
-
-    result = {
-        "url": url,
-        "title": title,
-        "date": date,
-        "author": None,
-        "category": category,
-        "tags": None,
-        "text": text,
-        "site": "auto.ru",
-        "fetched_at": datetime.now(timezone.utc).isoformat(),
-    }
-
-    return result
-
-
-def load_urls():
-    with open(URLS_FILE, "r", encoding="utf-8") as f:
+def load_urls(path: str = URLS_FILE):
+    with open(path, "r", encoding="utf-8") as f:
         urls = [line.strip() for line in f if line.strip()]
     urls = list(dict.fromkeys(urls))
     return urls
 
 
-def load_processed_urls():
-    processed = set()
-    if not os.path.exists(OUT_FILE):
-        return processed
+def document_ready(driver) -> bool:
+    return driver.execute_script("return document.readyState") == "complete"
 
-    with open(OUT_FILE, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                data = json.loads(line)
-                url = data.get("url")
-                if url:
-                    processed.add(url)
-            except json.JSONDecodeError:
-                continue
-    return processed
 
+def scrolled_to_bottom(driver) -> bool:
+    return driver.execute_script(
+        "return window.innerHeight + window.scrollY >= document.body.scrollHeight - 2"
+    )
 
-def main():
-    urls = load_urls()
-    print(f"Всего URL в списке: {len(urls)}")
-
-    processed_urls = load_processed_urls()
-    print(f"Уже сохранено документов: {len(processed_urls)}")
 
-    to_process = [u for u in urls if u not in processed_urls]
-    print(f"Осталось обработать URL: {len(to_process)}")
+def fetch_html(browser: BrowserSession, url: str, limiter: HostRateLimiter,
+               metrics: ScraperMetrics, timings: dict):
+    html = None
+    for attempt in range(3):
+        if attempt:
+            metrics.inc("retries")
+            timings["retries"] = attempt
+        with metrics.timer("rate_wait", timings):
+            limiter.acquire(url)
+        try:
+            launches, start = browser.launches, time.perf_counter()
+            driver = browser.get()
+            if browser.launches != launches:
+                timings["browser_start"] = time.perf_counter() - start
+                metrics.observe("browser_start", timings["browser_start"])
+            with metrics.timer("navigate", timings):
+                driver.get(url)
+            with metrics.timer("wait", timings):
+                WebDriverWait(driver, PAGE_TIMEOUT).until(document_ready)
+                try:
+                    # Не все страницы - статьи: если h1/time не появились, забираем как есть
+                    WebDriverWait(driver, ARTICLE_TIMEOUT).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, "h1, time"))
+                    )
+                except TimeoutException:
+                    metrics.inc("wait_timeouts", kind="article")
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                try:
+                    WebDriverWait(driver, ARTICLE_TIMEOUT, poll_frequency=0.2).until(scrolled_to_bottom)
+                except TimeoutException:
+                    metrics.inc("wait_timeouts", kind="scroll")
+            with metrics.timer("page_source", timings):
+                html = driver.page_source
+            browser.page_done()
+            limiter.on_success(url)
+            break
+        except InvalidSessionIdException:
+            # Перезапускаем только сессию этого воркера
+            metrics.inc("errors", kind="session")
+            browser.restart()
+        except WebDriverException:
+            metrics.inc("errors", kind="webdriver")
+            limiter.on_error(url)
+    return html
+
+
+def parse_html(pool: ProcessPoolExecutor | None, html: str, url: str, backend: str, require_h1: bool = False):
+    if pool is None:
+        return parse_article_html(html, url, MIN_CHARS, require_h1, backend)
+    return pool.submit(parse_article_html, html, url, MIN_CHARS, require_h1, backend)
+
+
+def save_html(directory: str, url: str, html: str):
+    name = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16] + ".html"
+    with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+        f.write(html)
+
+
+def fetch_via_http(fetcher: HttpFetcher, url: str, limiter: HostRateLimiter,
+                   pool: ProcessPoolExecutor | None, backend: str, headers: dict | None,
+                   metrics: ScraperMetrics, timings: dict):
+    with metrics.timer("rate_wait", timings):
+        limiter.acquire(url)
+    with metrics.timer("http", timings):
+        status, html, resp_headers = fetcher.fetch(url, headers)
+    metrics.inc("http_status", code=str(status or "error"))
+    info = {
+        "status": status,
+        "etag": resp_headers.get("etag"),
+        "last_modified": resp_headers.get("last-modified"),
+    }
+    if status is None or status == 429 or status >= 500:
+        limiter.on_error(url)
+        return None, None, info
+    limiter.on_success(url)
+    if status != 200 or not html:
+        return None, None, info
+    # Без h1 страница, скорее всего, собирается JS-ом - отдаём её Selenium
+    with metrics.timer("parse", timings):
+        item = parse_html(pool, html, url, backend, require_h1=True)
+        if isinstance(item, Future):
+            item = item.result()
+    return item, html, info
+
+
+# Конвейер fetch -> parse -> write. Браузеры живут в потоках стадии fetch,
+# разбор - в стадии parse (при --parse-procs - в пуле процессов), а пишет в
+# хранилище единственный поток стадии write
+class Scraper:
+    def __init__(self, args, store, meta: FetchMetaStore, limiter: HostRateLimiter,
+                 fetcher: HttpFetcher | None, pool: ProcessPoolExecutor | None, pbar,
+                 frontier: UrlFrontier | None = None, metrics: ScraperMetrics | None = None,
+                 timings_log=None):
+        self.args = args
+        self.target = args.target
+        self.frontier = frontier
+        self.store = store
+        self.meta = meta
+        self.limiter = limiter
+        self.fetcher = fetcher
+        self.pool = pool
+        self.pbar = pbar
+        self.pipeline: Pipeline | None = None
+        self.saved = len(store)
+        self.changed = 0
+        self.unchanged = 0
+        self.served_by = Counter()
+        self.browsers: list[BrowserSession] = []
+        self.metrics = metrics or ScraperMetrics()
+        self.timings_log = timings_log
+
+    # Браузер поднимается лениво: в режиме http-first он может не понадобиться
+    def init_fetch(self):
+        browser = BrowserSession(headless=not self.args.headed, block=not self.args.no_block,
+                                 max_pages=self.args.recycle_pages, max_rss_mb=self.args.recycle_rss_mb)
+        self.browsers.append(browser)
+        return {"browser": browser}
+
+    @staticmethod
+    def close_fetch(state):
+        state["browser"].quit()
+
+    # Страница доходит до write в любом случае: там по ней ведётся учёт
+    # (время по шагам, причина отказа), отброшенные просто не сохраняются
+    def fetch(self, state, url: str):
+        page = {"url": url, "html": None, "via": "http", "info": {}, "item": None,
+                "reason": None, "timings": {}, "started": time.perf_counter()}
+        if self.fetcher:
+            headers = self.meta.conditional_headers(url) if self.args.refresh else None
+            page["item"], page["html"], page["info"] = fetch_via_http(
+                self.fetcher, url, self.limiter, self.pool, self.args.parser, headers,
+                self.metrics, page["timings"]
+            )
+            if page["info"].get("status") == 304:
+                return page
+            if page["item"] is None:
+                self.metrics.inc("fallback", reason="no_h1" if page["html"] else "http_status")
+
+        if page["item"] is None:
+            page["html"] = fetch_html(state["browser"], url, self.limiter, self.metrics, page["timings"])
+            page["via"] = "selenium"
+            if not page["html"]:
+                page["reason"] = "no_html"
+                return page
+
+        if self.args.save_html:
+            save_html(self.args.save_html, url, page["html"])
+        return page
+
+    def parse(self, state, page: dict):
+        if page["item"] is None and page["html"]:
+            with self.metrics.timer("parse", page["timings"]):
+                item = parse_html(self.pool, page["html"], page["url"], self.args.parser)
+                page["item"] = item.result() if isinstance(item, Future) else item
+            if page["item"] is None:
+                page["reason"] = "too_short"
+        page["html"] = None
+        return page
+
+    def write(self, state, page: dict):
+        with self.metrics.timer("write", page["timings"]):
+            outcome = self._write(page)
+        if page["reason"]:
+            self.metrics.inc("rejected", reason=page["reason"])
+        self.metrics.inc("pages", outcome=outcome)
+        total = time.perf_counter() - page["started"]
+        self.metrics.observe("total", total)
+        if self.timings_log is not None:
+            record = {"url": page["url"], "via": page["via"], "outcome": outcome, "reason": page["reason"],
+                      "total": round(total, 4), **{k: round(v, 4) for k, v in page["timings"].items()}}
+            self.timings_log.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return None
 
-    driver = setup_driver()
+    def _write(self, page: dict) -> str:
+        url, item, info = page["url"], page["item"], page["info"]
+        if self.args.refresh:
+            self.pbar.update(1)
+
+        if info.get("status") == 304:
+            self.meta.update(url, changed=False)
+            self.unchanged += 1
+            return "not_modified"
+        if not item:
+            if self.frontier is not None:
+                if page["reason"] == "no_html":
+                    # Сбой загрузки может быть временным - URL вернётся в очередь позже
+                    self.frontier.mark_failed(url)
+                else:
+                    self.frontier.mark_done(url, SKIPPED)
+            return "rejected"
+
+        content_hash = body_hash(item["text"])
+        if self.args.refresh:
+            previous = self.meta.get(url)
+            if previous and previous["body_hash"] == content_hash:
+                self.meta.update(url, changed=False, etag=info.get("etag"),
+                                 last_modified=info.get("last_modified"))
+                self.unchanged += 1
+                return "unchanged"
+        elif self.saved >= self.target:
+            return "over_target"
+
+        item["fetched_via"] = page["via"]
+        item["content_hash"] = content_hash
+        self.store.write(item)
+        self.meta.update(url, changed=True, content_hash=content_hash, etag=info.get("etag"),
+                         last_modified=info.get("last_modified"))
+
+        self.served_by[page["via"]] += 1
+        if self.frontier is not None:
+            self.frontier.mark_done(url)
+        if self.args.refresh:
+            self.changed += 1
+            return "changed"
+        self.saved += 1
+        self.pbar.update(1)
+        if self.saved >= self.target:
+            self.pipeline.stop()
+        return "saved"
+
+    def build_pipeline(self) -> Pipeline:
+        args = self.args
+        self.pipeline = Pipeline([
+            Stage("fetch", self.fetch, workers=args.workers, queue_size=args.queue_size,
+                  init=self.init_fetch, close=self.close_fetch),
+            Stage("parse", self.parse, workers=args.parse_workers, queue_size=args.queue_size),
+            Stage("write", self.write, workers=1, queue_size=args.queue_size),
+        ])
+        return self.pipeline
+
+
+def open_store(args):
+    if args.storage == "zstd":
+        return ShardedCorpusWriter(args.corpus_dir, group_size=args.group_size or 64, fsync=args.fsync)
+    os.makedirs(os.path.dirname(args.out_file) or ".", exist_ok=True)
+    return JsonlWriter(args.out_file, group_size=args.group_size or 1, fsync=args.fsync)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Скачивание статей auto.ru/mag с возобновлением")
+    parser.add_argument("--workers", type=int, default=1, help="число параллельных сессий браузера")
+    parser.add_argument("--headed", action="store_true", help="показывать окно браузера (по умолчанию headless)")
+    parser.add_argument("--no-block", action="store_true",
+                        help="не блокировать картинки, медиа, шрифты и счётчики")
+    parser.add_argument("--recycle-pages", type=int, default=MAX_PAGES,
+                        help="пересоздавать сессию браузера каждые N страниц (0 - никогда)")
+    parser.add_argument("--recycle-rss-mb", type=float, default=MAX_RSS_MB,
+                        help="пересоздавать сессию, если Chrome занял больше N МБ RSS (0 - не следить)")
+    parser.add_argument("--fetch-mode", choices=["selenium", "http-first"], default="selenium",
+                        help="http-first: сначала обычный HTTP, Selenium только как запасной путь")
+    parser.add_argument("--rate", type=float, default=1.0, help="стартовая скорость, запросов/с на хост")
+    parser.add_argument("--max-rate", type=float, default=8.0, help="верхняя граница скорости на хост")
+    parser.add_argument("--parser", choices=available_backends(), default=DEFAULT_BACKEND,
+                        help="бэкенд разбора HTML")
+    parser.add_argument("--parse-workers", type=int, default=1, help="число потоков стадии разбора")
+    parser.add_argument("--parse-procs", type=int, default=0,
+                        help="число процессов для разбора HTML (0 - разбирать в потоке стадии)")
+    parser.add_argument("--queue-size", type=int, default=16, help="ёмкость очереди перед каждой стадией")
+    parser.add_argument("--stats-interval", type=float, default=0.0,
+                        help="печатать счётчики стадий раз в N секунд (0 - только в конце)")
+    parser.add_argument("--save-html", default=None, help="каталог для сохранения сырых HTML (фикстуры)")
+    parser.add_argument("--refresh", action="store_true",
+                        help="повторный обход уже скачанных статей, у которых подошёл срок")
+    parser.add_argument("--target", type=int, default=TARGET_DOCS, help="сколько документов собрать")
+    parser.add_argument("--frontier", action="store_true",
+                        help="брать URL из фронтира (url_frontier.py) по приоритету вместо --urls-file")
+    parser.add_argument("--urls-file", default=URLS_FILE)
+    parser.add_argument("--out-file", default=OUT_FILE)
+    parser.add_argument("--meta-db", default=META_DB)
+    parser.add_argument("--storage", choices=["jsonl", "zstd"], default="jsonl",
+                        help="zstd: сжатые шарды с индексом URL -> (шард, смещение)")
+    parser.add_argument("--corpus-dir", default=CORPUS_DIR)
+    parser.add_argument("--group-size", type=int, default=None,
+                        help="сколько записей фиксировать за раз (по умолчанию 1 для jsonl, 64 для zstd)")
+    parser.add_argument("--fsync", action="store_true", help="fsync после каждой групповой фиксации")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="отдавать метрики на http://127.0.0.1:PORT/metrics (Prometheus) и /metrics.json")
+    parser.add_argument("--metrics-json", default=None, help="периодически сохранять снимок метрик в JSON-файл")
+    parser.add_argument("--metrics-interval", type=float, default=10.0, help="период записи --metrics-json, с")
+    parser.add_argument("--timings-log", default=None, help="JSONL с разбивкой времени по каждому URL")
+    return parser.parse_args()
 
-    saved = len(processed_urls)
-    total_target = min(TARGET_DOCS, len(urls))
 
-    pbar = tqdm(total=max(0, total_target - saved), desc="Скачивание статей (Selenium, resume)")
+def main():
+    args = parse_args()
+    workers = args.workers = max(1, args.workers)
+
+    store = open_store(args)
+    print(f"Уже сохранено документов: {len(store)}")
+
+    frontier = None
+    if args.frontier:
+        frontier = UrlFrontier()
+        total_urls = len(frontier)
+        print(f"URL во фронтире: {total_urls}, не обработано: {frontier.pending()}")
+        urls = None
+    else:
+        urls = load_urls(args.urls_file)
+        total_urls = len(urls)
+        print(f"Всего URL в списке: {total_urls}")
+
+    meta = FetchMetaStore(args.meta_db)
+    if args.refresh:
+        if urls is not None:
+            meta.seed(u for u in urls if u in store)
+        to_process = meta.due()
+        print(f"К повторному обходу: {len(to_process)}")
+        if args.fetch_mode != "http-first":
+            # Условные запросы (ETag/Last-Modified) возможны только по HTTP
+            args.fetch_mode = "http-first"
+    elif frontier is not None:
+        # Сверка с хранилищем - здесь, в главном потоке: поток подачи URL его не трогает
+        stored = frontier.mark_stored(store)
+        if stored:
+            print(f"Уже в хранилище, пропущено URL фронтира: {stored}")
+        to_process = frontier.iter_pending()
+    else:
+        to_process = [u for u in urls if u not in store]
+        print(f"Осталось обработать URL: {len(to_process)}")
+
+    fetcher = HttpFetcher(pool_size=workers * 2) if args.fetch_mode == "http-first" else None
+    limiter = HostRateLimiter(rate=args.rate, max_rate=args.max_rate)
+    pool = ProcessPoolExecutor(max_workers=args.parse_procs) if args.parse_procs > 0 else None
+    if args.save_html:
+        os.makedirs(args.save_html, exist_ok=True)
+
+    saved = len(store)
+    total_target = min(args.target, total_urls)
+    if args.refresh:
+        pbar = tqdm(total=len(to_process), desc=f"Повторный обход (x{workers})")
+    else:
+        pbar = tqdm(total=max(0, total_target - saved), desc=f"Скачивание статей (Selenium x{workers}, resume)")
+
+    metrics = ScraperMetrics()
+    metrics_server = metrics.serve(args.metrics_port) if args.metrics_port else None
+    if metrics_server is not None:
+        print(f"Метрики: http://127.0.0.1:{args.metrics_port}/metrics")
+    timings_log = open(args.timings_log, "a", encoding="utf-8") if args.timings_log else None
+
+    scraper = Scraper(args, store, meta, limiter, fetcher, pool, pbar, frontier, metrics, timings_log)
+    pipeline = scraper.build_pipeline()
 
     try:
-        with open(OUT_FILE, "a", encoding="utf-8") as out:
-            for url in to_process:
-                if saved >= TARGET_DOCS:
-                    break
-
-                html = None
-                for attempt in range(3):
-                    try:
-                        driver.get(url)
-                        time.sleep(random.uniform(2.0, 3.5))
-                        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                        time.sleep(random.uniform(1.0, 2.0))
-                        html = driver.page_source
-                        break
-                    except InvalidSessionIdException:
-                        try:
-                            driver.quit()
-                        except Exception:
-                            pass
-                        driver = setup_driver()
-                    except WebDriverException:
-                        time.sleep(2.0)
-
-                if not html:
-                    continue
-
-                item = parse_article_html(html, url, MIN_CHARS)
-                if not item:
-                    continue
-
-                out.write(json.dumps(item, ensure_ascii=False) + "\n")
-                out.flush()
-
-                saved += 1
-                pbar.update(1)
-
+        if saved < args.target or args.refresh:
+            pipeline.start(to_process)
+            last_stats = last_snapshot = time.monotonic()
+            while pipeline.alive():
+                time.sleep(0.5)
+                if args.stats_interval and time.monotonic() - last_stats >= args.stats_interval:
+                    tqdm.write(pipeline.format_stats())
+                    last_stats = time.monotonic()
+                if args.metrics_json and time.monotonic() - last_snapshot >= args.metrics_interval:
+                    metrics.write_json(args.metrics_json)
+                    last_snapshot = time.monotonic()
     finally:
+        pipeline.stop()
         pbar.close()
-        try:
-            driver.quit()
-        except Exception:
-            pass
-
-    print(f"Итого сохранено документов: {saved} (см. {OUT_FILE})")
+        pipeline.join(timeout=60)
+        if args.metrics_json:
+            metrics.write_json(args.metrics_json)
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        if timings_log is not None:
+            timings_log.close()
+        if fetcher is not None:
+            fetcher.close()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        store.close()
+        meta.close()
+        if frontier is not None:
+            # Выданные, но не сохранённые URL (сверх цели, оставшиеся в очередях) - обратно в очередь
+            frontier.reset_leases()
+            frontier.close()
+
+    print(pipeline.format_stats())
+    print(metrics.format_summary())
+    for stage, error in pipeline.errors[:10]:
+        print(f"[WARN] {stage}: {error}")
+
+    location = args.corpus_dir if args.storage == "zstd" else args.out_file
+    if args.refresh:
+        print(f"Изменилось статей: {scraper.changed}, без изменений: {scraper.unchanged} (см. {location})")
+    else:
+        print(f"Итого сохранено документов: {scraper.saved} (см. {location})")
+    fetched = sum(scraper.served_by.values())
+    if fetched:
+        for path, count in scraper.served_by.most_common():
+            print(f"  {path}: {count} ({count / fetched:.1%})")
+    recycled = sum(b.recycles for b in scraper.browsers)
+    crashed = sum(b.crashes for b in scraper.browsers)
+    if recycled or crashed:
+        print(f"Перезапусков браузера: плановых {recycled}, после сбоя {crashed}")
 
 
 if __name__ == "__main__":
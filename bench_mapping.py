@@ -0,0 +1,113 @@
+import argparse
+import copy
+import statistics
+import time
+from itertools import islice
+
+from bulk_indexer import BulkIndexer
+from corpus_storage import iter_documents
+from extraction_report import index_store_bytes
+from index_data import DATA_FILE, doc_id, index_body, with_hash
+from opensearch_client import get_client
+
+LEGACY_INDEX = "autoru_mag_bench_legacy"
+TUNED_INDEX = "autoru_mag_bench_tuned"
+
+# (название, запрос к старой схеме, запрос к новой схеме)
+QUERIES = [
+    (
+        "vin: *vin* -> title.ngram",
+        {"query": {"wildcard": {"title": {"value": "*vin*"}}}},
+        {"query": {"match": {"title.ngram": "vin"}}},
+    ),
+    (
+        "фраза с префиксом",
+        {"query": {"match_phrase_prefix": {"title": "новые кит"}}},
+        {"query": {"match_phrase_prefix": {"title": "новые кит"}}},
+    ),
+    (
+        "контроль: multi_match",
+        {"query": {"multi_match": {"query": "зимние шины", "fields": ["title^3", "text"]}}},
+        {"query": {"multi_match": {"query": "зимние шины", "fields": ["title^3", "text"]}}},
+    ),
+]
+
+
+# Старая схема: title без подполей, у lead - позиции по умолчанию
+def legacy_body() -> dict:
+    body = copy.deepcopy(index_body())
+    props = body["mappings"]["properties"]
+    props["title"] = {"type": "text", "analyzer": "ru_analyzer"}
+    props["lead"].pop("index_options", None)
+    return body
+
+
+def build(name: str, body: dict, docs: list[dict]):
+    client = get_client()
+    client.delete(name)
+    client.put(name, json_body=body).raise_for_status()
+    indexer = BulkIndexer(client)
+    for doc in docs:
+        indexer.add({"index": {"_index": name, "_id": doc_id(doc["url"])}}, doc)
+    indexer.close()
+    client.post(f"{name}/_refresh").raise_for_status()
+    client.post(f"{name}/_forcemerge", params={"max_num_segments": 1}, timeout=600).raise_for_status()
+
+
+def measure(index: str, body: dict, repeat: int) -> tuple[list[float], int]:
+    client = get_client()
+    latencies = []
+    hits = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        r = client.get(f"{index}/_search", json_body=body, params={"size": 10, "request_cache": "false"})
+        latencies.append((time.perf_counter() - start) * 1000)
+        r.raise_for_status()
+        hits = r.json()["hits"]["total"]["value"]
+    return latencies, hits
+
+
+def p95(values: list[float]) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(0.95 * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Задержка запросов и размер индекса: старая и новая схема")
+    parser.add_argument("--data", default=DATA_FILE)
+    parser.add_argument("--docs", type=int, default=3000, help="сколько документов корпуса загрузить")
+    parser.add_argument("--repeat", type=int, default=50, help="повторов каждого запроса")
+    parser.add_argument("--keep", action="store_true", help="не удалять тестовые индексы")
+    args = parser.parse_args()
+
+    docs = [with_hash(d) for d in islice((d for d in iter_documents(args.data) if d.get("url")), args.docs)]
+    if not docs:
+        print(f"Нет документов в {args.data}")
+        return
+    print(f"Загружаю {len(docs)} документов в {LEGACY_INDEX} и {TUNED_INDEX}...")
+    build(LEGACY_INDEX, legacy_body(), docs)
+    build(TUNED_INDEX, index_body(), docs)
+
+    try:
+        before, after = index_store_bytes(LEGACY_INDEX), index_store_bytes(TUNED_INDEX)
+        print(f"\nРазмер индекса: {before / 2**20:.1f} МБ -> {after / 2**20:.1f} МБ ({after / before - 1:+.1%})")
+
+        print(f"\n{'запрос':<28} {'p50 до':>8} {'p50 после':>10} {'p95 до':>8} {'p95 после':>10} "
+              f"{'найдено до/после':>18}")
+        for name, legacy, tuned in QUERIES:
+            # Прогрев, чтобы не мерить первое обращение к сегментам
+            measure(LEGACY_INDEX, legacy, 3)
+            measure(TUNED_INDEX, tuned, 3)
+            lb, hb = measure(LEGACY_INDEX, legacy, args.repeat)
+            la, ha = measure(TUNED_INDEX, tuned, args.repeat)
+            print(f"{name:<28} {statistics.median(lb):>8.1f} {statistics.median(la):>10.1f} "
+                  f"{p95(lb):>8.1f} {p95(la):>10.1f} {f'{hb}/{ha}':>18}")
+        print("(задержка в мс, кэш запросов отключён)")
+    finally:
+        if not args.keep:
+            for name in (LEGACY_INDEX, TUNED_INDEX):
+                get_client().delete(name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# resource есть только в POSIX; в Windows пик RSS берётся из psutil (peak_wset), если он установлен
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from html_parsing import available_backends, parse_article_html
+
+
+FIXTURES_DIR = "fixtures/html"
+
+
+def load_fixtures(directory: str) -> list[tuple[str, str]]:
+    paths = sorted(Path(directory).glob("*.html"))
+    return [(p.name, p.read_text(encoding="utf-8", errors="replace")) for p in paths]
+
+
+def peak_rss_mb() -> float | None:
+    if resource is not None:
+        # ru_maxrss в Linux - в килобайтах
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    if psutil is not None:
+        peak = getattr(psutil.Process().memory_info(), "peak_wset", None)
+        return peak / 2**20 if peak else None
+    return None
+
+
+def run_backend(backend: str, directory: str, repeat: int) -> dict:
+    docs = load_fixtures(directory)
+    parsed = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for name, html in docs:
+            if parse_article_html(html, name, 0, backend=backend):
+                parsed += 1
+    elapsed = time.perf_counter() - start
+
+    total = len(docs) * repeat
+    return {
+        "backend": backend,
+        "docs": total,
+        "parsed": parsed,
+        "seconds": elapsed,
+        "docs_per_sec": total / elapsed if elapsed > 0 else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение бэкендов разбора HTML")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR,
+                        help="каталог с сохранёнными HTML (см. --save-html у скрапера)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--backend", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Каждый бэкенд меряется в отдельном процессе, чтобы пиковая RSS не смешивалась
+    if args.backend:
+        print(json.dumps(run_backend(args.backend, args.fixtures, args.repeat)))
+        return
+
+    docs = load_fixtures(args.fixtures)
+    if not docs:
+        print(f"Нет HTML-фикстур в {args.fixtures}")
+        return
+    print(f"Фикстур: {len(docs)}, повторов: {args.repeat}")
+
+    print(f"\n{'Бэкенд':<12} {'док/с':>10} {'пик RSS, МБ':>12} {'разобрано':>10}")
+    print("-" * 48)
+    for backend in available_backends():
+        out = subprocess.run(
+            [sys.executable, __file__, "--fixtures", args.fixtures,
+             "--repeat", str(args.repeat), "--backend", backend],
+            capture_output=True, text=True, check=True,
+        )
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        rss = "n/a" if r["peak_rss_mb"] is None else f"{r['peak_rss_mb']:.1f}"
+        print(f"{r['backend']:<12} {r['docs_per_sec']:>10.1f} {rss:>12} {r['parsed']:>10}")
+
+
+if __name__ == "__main__":
+    main()
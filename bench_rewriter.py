@@ -0,0 +1,92 @@
+import argparse
+import random
+import statistics
+import time
+
+from bench_mapping import p95
+from collect_for_labeling import TEST_QUERIES
+from query_rewriter import Spellfixer, SynonymTable
+from search_app import SPELLFIX_FILE, SYNONYMS_FILE, load_json_file, normalize_text
+
+ALPHABET = "абвгдежзийклмнопрстуфхцчшщыэюя"
+
+
+# Прежняя реализация search_app: сортировка ключей и str.replace по каждой фразе на каждый запрос
+def legacy_spellfix(text: str, spellfix: dict[str, str]) -> str:
+    fixed_text = text
+    for phrase in sorted(spellfix.keys(), key=len, reverse=True):
+        if phrase in fixed_text:
+            fixed_text = fixed_text.replace(phrase, spellfix[phrase])
+    return fixed_text
+
+
+def legacy_expand(text: str, synonyms: dict[str, list[str]]) -> list[str]:
+    expanded = []
+    for token in normalize_text(text).split():
+        expanded.append(token)
+        if token in synonyms:
+            expanded.extend(synonyms[token])
+    return sorted(set(expanded))
+
+
+def random_word(rng: random.Random) -> str:
+    return "".join(rng.choices(ALPHABET, k=rng.randint(4, 11)))
+
+
+# Реальные словари, дополненные случайными словами и фразами до size записей
+def scaled(spellfix: dict, synonyms: dict, size: int, seed: int = 1) -> tuple[dict, dict]:
+    rng = random.Random(seed)
+    spellfix, synonyms = dict(spellfix), dict(synonyms)
+    while len(spellfix) < size:
+        phrase = " ".join(random_word(rng) for _ in range(rng.randint(1, 3)))
+        spellfix[phrase] = random_word(rng)
+    while len(synonyms) < size:
+        synonyms[random_word(rng)] = [random_word(rng) for _ in range(rng.randint(1, 4))]
+    return spellfix, synonyms
+
+
+def per_query_us(fn, queries: list[str], repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        for q in queries:
+            start = time.perf_counter()
+            fn(q)
+            timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Старая и скомпилированная переработка запроса на больших словарях")
+    parser.add_argument("--sizes", default="19,1000,10000,100000", help="размеры словарей через запятую")
+    parser.add_argument("--repeat", type=int, default=20, help="повторов набора запросов")
+    args = parser.parse_args()
+
+    base_spellfix = load_json_file(SPELLFIX_FILE)
+    base_synonyms = load_json_file(SYNONYMS_FILE)
+    queries = [normalize_text(q) for q in TEST_QUERIES] + list(base_spellfix)
+
+    # На реальных словарях: где ответы расходятся (граница слова, один проход вместо каскада замен)
+    fixer = Spellfixer(base_spellfix)
+    diff = [q for q in queries if fixer.apply(q) != legacy_spellfix(q, base_spellfix)]
+    print(f"Расхождений spellfix на реальном словаре: {len(diff)} из {len(queries)}")
+    for q in diff[:5]:
+        print(f"  {q!r}: {legacy_spellfix(q, base_spellfix)!r} -> {fixer.apply(q)!r}")
+
+    print(f"\n{'записей':>8} {'сборка, с':>10} {'spellfix p50/p95, мкс':>26} {'синонимы p50/p95, мкс':>26}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        spellfix, synonyms = scaled(base_spellfix, base_synonyms, size)
+        start = time.perf_counter()
+        fixer, table = Spellfixer(spellfix), SynonymTable(synonyms)
+        build = time.perf_counter() - start
+
+        old_fix = per_query_us(lambda q: legacy_spellfix(q, spellfix), queries, max(1, args.repeat // 10))
+        new_fix = per_query_us(fixer.apply, queries, args.repeat)
+        old_syn = per_query_us(lambda q: legacy_expand(q, synonyms), queries, args.repeat)
+        new_syn = per_query_us(table.expand_tokens, queries, args.repeat)
+        print(f"{size:>8} {build:>10.2f} "
+              f"{statistics.median(old_fix):>9.0f}/{p95(old_fix):<6.0f}->{statistics.median(new_fix):>5.0f}/{p95(new_fix):<4.0f}"
+              f"{statistics.median(old_syn):>9.1f}/{p95(old_syn):<5.1f}->{statistics.median(new_syn):>5.1f}/{p95(new_syn):<4.1f}")
+
+
+if __name__ == "__main__":
+    main()
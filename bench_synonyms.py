@@ -0,0 +1,88 @@
+import argparse
+import re
+import statistics
+import time
+
+from bench_mapping import p95
+from collect_for_labeling import TEST_QUERIES
+from opensearch_client import get_client
+from search_app import build_query_body, load_spellfix, load_synonyms
+
+# Термы Lucene-запроса после анализа: "title:машина", "text:авто~1" и т.п.
+LUCENE_CLAUSE_RE = re.compile(r"\b(?:title|text|lead)(?:\.\w+)?:")
+
+
+def dsl_clauses(node) -> int:
+    if isinstance(node, list):
+        return sum(dsl_clauses(n) for n in node)
+    if not isinstance(node, dict):
+        return 0
+    count = 0
+    for key, value in node.items():
+        if key == "bool":
+            count += dsl_clauses(value)
+        elif key in ("should", "must", "must_not", "filter"):
+            count += dsl_clauses(value)
+        elif key in ("multi_match", "match", "match_phrase", "term", "wildcard", "prefix", "range"):
+            count += 1
+        elif isinstance(value, (dict, list)):
+            count += dsl_clauses(value)
+    return count
+
+
+def lucene_clauses(body: dict) -> int:
+    r = get_client().get(
+        f"{get_client().index}/_validate/query",
+        json_body={"query": body["query"]},
+        params={"explain": "true", "rewrite": "true", "all_shards": "true"},
+    )
+    r.raise_for_status()
+    explanations = r.json().get("explanations") or []
+    if not explanations:
+        return 0
+    return len(LUCENE_CLAUSE_RE.findall(explanations[0].get("explanation", "")))
+
+
+def measure(body: dict, repeat: int) -> tuple[list[float], list[str]]:
+    client = get_client()
+    latencies = []
+    ids = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        r = client.get(f"{client.index}/_search", json_body=body, params={"size": 10, "request_cache": "false"})
+        latencies.append((time.perf_counter() - start) * 1000)
+        r.raise_for_status()
+        ids = [h["_id"] for h in r.json()["hits"]["hits"]]
+    return latencies, ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Синонимы на клиенте vs synonym_graph в индексе")
+    parser.add_argument("--repeat", type=int, default=50, help="повторов каждого запроса")
+    args = parser.parse_args()
+
+    synonyms = load_synonyms()
+    spellfix = load_spellfix()
+
+    print(f"{'запрос':<34} {'DSL кл.':>9} {'Lucene кл.':>11} {'p95 клиент':>11} {'p95 индекс':>11} {'top-10 общих':>13}")
+    all_client, all_index = [], []
+    for query in TEST_QUERIES:
+        # Клиентское плечо идёт с analyzer=ru_analyzer - synonym_graph индекса его не раскрывает
+        client_body = build_query_body(query, synonyms, spellfix, client_synonyms=True)
+        index_body = build_query_body(query, synonyms, spellfix, client_synonyms=False)
+        measure(client_body, 3)
+        measure(index_body, 3)
+        lc, ids_c = measure(client_body, args.repeat)
+        li, ids_i = measure(index_body, args.repeat)
+        all_client += lc
+        all_index += li
+        print(f"{query:<34} {dsl_clauses(client_body):>4}/{dsl_clauses(index_body):<4} "
+              f"{lucene_clauses(client_body):>5}/{lucene_clauses(index_body):<5} "
+              f"{p95(lc):>11.1f} {p95(li):>11.1f} {len(set(ids_c) & set(ids_i)):>13}")
+
+    print(f"\nВсе запросы: p50 {statistics.median(all_client):.1f} -> {statistics.median(all_index):.1f} мс, "
+          f"p95 {p95(all_client):.1f} -> {p95(all_index):.1f} мс (кэш запросов отключён)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import os
+import threading
+
+from selenium import webdriver
+from selenium.common.exceptions import SessionNotCreatedException
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+
+DRIVER_CACHE = "src/storage/chromedriver.path"
+MAX_PAGES = 200
+MAX_RSS_MB = 1500
+RSS_CHECK_EVERY = 10
+
+# Картинки, медиа, шрифты и счётчики для разбора статьи не нужны, а грузятся дольше всего
+BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.mp4", "*.webm", "*.m3u8", "*.ts", "*.mp3",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*avatars.mds.yandex.net*",
+    "*mc.yandex.ru*", "*an.yandex.ru*", "*yandex.ru/ads*", "*adfox.ru*", "*yastatic.net/pcode*",
+    "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*",
+    "*top-fwz1.mail.ru*", "*vk.com/rtrg*", "*tns-counter.ru*",
+]
+
+_driver_path = None
+_driver_lock = threading.Lock()
+
+
+# Путь к chromedriver ищется один раз: сначала файл-кэш с прошлого запуска,
+# потом ChromeDriverManager. Перезапуски сессий берут уже найденный бинарник
+def driver_path(cache_file: str = DRIVER_CACHE) -> str:
+    global _driver_path
+    with _driver_lock:
+        if _driver_path and os.path.exists(_driver_path):
+            return _driver_path
+        if os.path.exists(cache_file):
+            with open(cache_file, "r", encoding="utf-8") as f:
+                cached = f.read().strip()
+            if cached and os.path.exists(cached):
+                _driver_path = cached
+                return _driver_path
+        _driver_path = ChromeDriverManager().install()
+        os.makedirs(os.path.dirname(cache_file) or ".", exist_ok=True)
+        with open(cache_file, "w", encoding="utf-8") as f:
+            f.write(_driver_path)
+        return _driver_path
+
+
+# Chrome обновился и закэшированный chromedriver ему больше не подходит:
+# кэш сбрасывается, следующий driver_path() спросит ChromeDriverManager заново.
+# Сбрасывает только первый заметивший воркер - остальные уже получат новый путь
+def forget_driver_path(path: str, cache_file: str = DRIVER_CACHE):
+    global _driver_path
+    with _driver_lock:
+        if _driver_path != path:
+            return
+        _driver_path = None
+        if os.path.exists(cache_file):
+            os.remove(cache_file)
+
+
+def setup_driver(headless: bool = True, block: bool = True):
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--window-size=1366,900")
+    else:
+        options.add_argument("--start-maximized")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--no-first-run")
+    options.add_argument("--mute-audio")
+    if block:
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+
+    path = driver_path()
+    try:
+        driver = webdriver.Chrome(service=Service(path), options=options)
+    except SessionNotCreatedException:
+        print(f"[WARN] chromedriver {path} не подходит к Chrome - ищу заново")
+        forget_driver_path(path)
+        driver = webdriver.Chrome(service=Service(driver_path()), options=options)
+    if block:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+    return driver
+
+
+def _children(pid: int) -> list[int]:
+    children = []
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "r") as f:
+                # Имя процесса в скобках может содержать пробелы - режем по последней скобке
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            children.append(int(name))
+    return children
+
+
+def _rss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+# Суммарная RSS chromedriver и всего дерева процессов Chrome (только Linux, иначе 0)
+def process_tree_rss_mb(pid: int) -> float:
+    if not os.path.isdir("/proc"):
+        return 0.0
+    total, stack, seen = 0, [pid], set()
+    while stack:
+        p = stack.pop()
+        if p in seen:
+            continue
+        seen.add(p)
+        total += _rss_kb(p)
+        stack.extend(_children(p))
+    return total / 1024
+
+
+# Сессия браузера одного воркера: запускается лениво и пересоздаётся после
+# max_pages страниц или когда дерево процессов Chrome выросло больше max_rss_mb
+class BrowserSession:
+    def __init__(self, headless: bool = True, block: bool = True,
+                 max_pages: int = MAX_PAGES, max_rss_mb: float = MAX_RSS_MB):
+        self.headless = headless
+        self.block = block
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.driver = None
+        self.pages = 0
+        self.launches = 0
+        self.recycles = 0
+        self.crashes = 0
+
+    def _worn_out(self) -> bool:
+        if self.max_pages and self.pages >= self.max_pages:
+            return True
+        if self.max_rss_mb and self.pages and self.pages % RSS_CHECK_EVERY == 0:
+            process = getattr(self.driver.service, "process", None)
+            if process is not None and process_tree_rss_mb(process.pid) > self.max_rss_mb:
+                return True
+        return False
+
+    def get(self):
+        if self.driver is not None and self._worn_out():
+            self.quit()
+            self.recycles += 1
+        if self.driver is None:
+            self.driver = setup_driver(self.headless, self.block)
+            self.pages = 0
+            self.launches += 1
+        return self.driver
+
+    def page_done(self):
+        self.pages += 1
+
+    # Сессия умерла (InvalidSessionId): следующий get() поднимет новую
+    def restart(self):
+        self.quit()
+        self.crashes += 1
+
+    def quit(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
@@ -0,0 +1,135 @@
+import json
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from opensearch_client import SearchClient, get_client
+
+
+MAX_BATCH_BYTES = 5 * 2**20
+MAX_BATCH_DOCS = 2000
+IN_FLIGHT = 4
+MAX_RETRIES = 6
+BACKOFF = 0.5
+MAX_BACKOFF = 30.0
+
+
+def is_rejection(status: int, error: dict | None) -> bool:
+    error_type = (error or {}).get("type", "")
+    return status == 429 or "es_rejected_execution" in error_type or "rejected_execution" in error_type
+
+
+# Потоковая загрузка в _bulk: документы копятся в пачку до max_bytes/max_docs и
+# уходят в пул из in_flight потоков. Семафор не даёт набрать больше in_flight
+# пачек, поэтому память не зависит от размера корпуса. Повторно отправляются
+# только элементы, отклонённые из-за перегрузки (429 / es_rejected_execution)
+class BulkIndexer:
+    def __init__(self, client: SearchClient | None = None, max_bytes: int = MAX_BATCH_BYTES,
+                 max_docs: int = MAX_BATCH_DOCS, in_flight: int = IN_FLIGHT,
+                 max_retries: int = MAX_RETRIES, timeout: float = 120.0):
+        self.client = client or get_client()
+        self.max_bytes = max_bytes
+        self.max_docs = max_docs
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=in_flight, thread_name_prefix="bulk")
+        self._slots = threading.BoundedSemaphore(in_flight)
+        self._lock = threading.Lock()
+        self._batch: list[bytes] = []
+        self._batch_bytes = 0
+        self.indexed = 0
+        self.failed = 0
+        self.retried = 0
+        self.requests = 0
+        self.errors = Counter()
+
+    def add(self, action: dict, source: dict | None = None):
+        entry = json.dumps(action, ensure_ascii=False) + "\n"
+        if source is not None:
+            entry += json.dumps(source, ensure_ascii=False) + "\n"
+        data = entry.encode("utf-8")
+        if self._batch and (self._batch_bytes + len(data) > self.max_bytes or len(self._batch) >= self.max_docs):
+            self.flush()
+        self._batch.append(data)
+        self._batch_bytes += len(data)
+
+    def flush(self):
+        if not self._batch:
+            return
+        batch, self._batch, self._batch_bytes = self._batch, [], 0
+        self._slots.acquire()
+        future = self._pool.submit(self._send, batch)
+        future.add_done_callback(lambda f: self._done(f, len(batch)))
+
+    # Исключение вне обработанных в _send (ответ прокси вместо JSON, оборванный
+    # chunked-ответ и т.п.) не должно терять пачку молча: она целиком в ошибках
+    def _done(self, future, n: int):
+        try:
+            error = future.exception()
+            if error is not None:
+                self._fail(n, type(error).__name__)
+                print(f"[WARN] Пачка _bulk из {n} документов не отправлена: {error!r}")
+        finally:
+            self._slots.release()
+
+    def _count(self, **values):
+        with self._lock:
+            for name, value in values.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def _send(self, batch: list[bytes]):
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count(retried=len(batch))
+                delay = min(MAX_BACKOFF, BACKOFF * 2 ** (attempt - 1))
+                time.sleep(delay * (0.5 + random.random()))
+            try:
+                self._count(requests=1)
+                r = self.client.bulk(b"".join(batch), timeout=self.timeout)
+            except (ConnectionError, requests.Timeout):
+                continue
+            # Весь запрос отклонён: перегружен узел или очередь bulk
+            if r.status_code == 429 or r.status_code >= 500:
+                continue
+            if r.status_code >= 400:
+                self._fail(len(batch), f"HTTP {r.status_code}")
+                return
+
+            result = r.json()
+            if not result.get("errors"):
+                self._count(indexed=len(batch))
+                return
+            retry = []
+            for data, item in zip(batch, result["items"]):
+                res = next(iter(item.values()))
+                status = res.get("status", 500)
+                if status < 300:
+                    self._count(indexed=1)
+                elif is_rejection(status, res.get("error")):
+                    retry.append(data)
+                else:
+                    self._fail(1, (res.get("error") or {}).get("type", f"HTTP {status}"))
+            if not retry:
+                return
+            batch = retry
+        self._fail(len(batch), "rejected_after_retries")
+
+    def _fail(self, n: int, reason: str):
+        with self._lock:
+            self.failed += n
+            self.errors[reason] += n
+
+    def close(self):
+        self.flush()
+        self._pool.shutdown(wait=True)
+
+    def summary(self) -> str:
+        lines = [f"Проиндексировано: {self.indexed}, ошибок: {self.failed}, "
+                 f"повторов: {self.retried}, запросов _bulk: {self.requests}"]
+        for reason, n in self.errors.most_common(10):
+            lines.append(f"  {reason}: {n}")
+        return "\n".join(lines)
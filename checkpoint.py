@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+
+
+def url_hash(url: str) -> str:
+    return hashlib.blake2b(url.encode("utf-8"), digest_size=8).hexdigest()
+
+
+# Обрезает недописанную последнюю строку (падение посреди write); возвращает число срезанных байт
+def repair_tail(path: str, chunk: int = 64 * 1024) -> int:
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return 0
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return 0
+
+        pos = size
+        keep = 0
+        while pos > 0:
+            start = max(0, pos - chunk)
+            f.seek(start)
+            buf = f.read(pos - start)
+            nl = buf.rfind(b"\n")
+            if nl != -1:
+                keep = start + nl + 1
+                break
+            pos = start
+        f.truncate(keep)
+        return size - keep
+
+
+# Журнал-спутник к JSONL: строка "<hash url> <смещение конца записи>" на каждый
+# сохранённый документ. Старт читает только короткие строки журнала, а JSONL
+# дочитывается лишь после последнего смещения (если упали между двумя записями)
+class ResumeCheckpoint:
+    def __init__(self, data_path: str, ckpt_path: str | None = None):
+        self.data_path = data_path
+        self.ckpt_path = ckpt_path or data_path + ".ckpt"
+        self.hashes: set[str] = set()
+        self.offset = 0
+        self._log = None
+
+    def open(self):
+        cut = repair_tail(self.data_path)
+        if cut:
+            print(f"[WARN] Обрезана недописанная запись в {self.data_path}: {cut} байт")
+        repair_tail(self.ckpt_path)
+
+        self._load_log()
+        data_size = os.path.getsize(self.data_path) if os.path.exists(self.data_path) else 0
+        if self.offset > data_size:
+            # Журнал опережает данные (файл подменили или обрезали) - перестраиваем с нуля
+            print(f"[WARN] Журнал {self.ckpt_path} не соответствует данным, перестраиваю")
+            os.remove(self.ckpt_path)
+            self.hashes.clear()
+            self.offset = 0
+
+        self._log = open(self.ckpt_path, "a", encoding="utf-8")
+        if data_size > self.offset:
+            self._catch_up()
+        return self
+
+    def _load_log(self):
+        if not os.path.exists(self.ckpt_path):
+            return
+        with open(self.ckpt_path, "r", encoding="utf-8") as f:
+            for line in f:
+                h, _, offset = line.partition(" ")
+                if offset:
+                    self.hashes.add(h)
+                    self.offset = int(offset)
+
+    def _catch_up(self):
+        with open(self.data_path, "rb") as f:
+            f.seek(self.offset)
+            for line in f:
+                self.offset += len(line)
+                try:
+                    url = json.loads(line).get("url")
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                if url:
+                    self.record(url, self.offset)
+
+    def __contains__(self, url: str) -> bool:
+        return url_hash(url) in self.hashes
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def record(self, url: str, end_offset: int):
+        h = url_hash(url)
+        self.hashes.add(h)
+        self.offset = end_offset
+        self._log.write(f"{h} {end_offset}\n")
+        self._log.flush()
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
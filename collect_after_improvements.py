@@ -1,12 +1,16 @@
+import argparse
 import csv
 import json
+import time
 from pathlib import Path
-import requests
 import re
 
-ES_URL = "http://localhost:9200"
-INDEX_NAME = "autoru_mag"
-AUTH = ("admin", "StrongPassw0rd!")
+from collect_for_labeling import load_queries
+from index_layout import search_scope, year_filter_enabled
+from local_search import get_searcher
+from query_rewriter import SynonymTable
+from search_cache import cached_msearch, cached_search, get_cache
+
 
 TEST_QUERIES = [
     "зимние шины",
@@ -25,9 +29,9 @@ TEST_QUERIES = [
 def load_synonyms():
     path = Path(__file__).parent / "synonyms.json"
     if not path.exists():
-        return {}
+        return SynonymTable({})
     with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+        return SynonymTable(json.load(f))
 
 
 SYN = load_synonyms()
@@ -38,28 +42,13 @@ def normalize_query(q: str) -> str:
 
 
 def build_synonym_query(q: str) -> str | None:
-    q_norm = normalize_query(q)
-    phrases = list(SYN.keys())
-    phrases.sort(key=len, reverse=True)
-    used: list[str] = []
-    tmp = q_norm
-
-    for p in phrases:
-        if p in tmp:
-            used.extend(SYN[p])
-            tmp = tmp.replace(p, " ")
-
-    tokens = re.findall(r"\w+", tmp, flags=re.UNICODE)
-    for t in tokens:
-        if t in SYN:
-            used.extend(SYN[t])
-
+    used = SYN.phrase_expansions(normalize_query(q))
     if not used:
         return None
-    return " ".join(sorted(set(used)))
+    return " ".join(used)
 
 
-def build_query_body(q: str) -> dict:
+def build_query_body(q: str, year_filter: bool = True) -> dict:
     syn_q = build_synonym_query(q)
     fields = ["title^4", "text"]
 
@@ -98,8 +87,6 @@ def build_query_body(q: str) -> dict:
                         }
                     ],
                     "must_not": [
-                        {"match_phrase": {"title": "Главное за день"}},
-                        {"match_phrase": {"title": "главное за день"}},
                         {"match": {"title": "электромобиль"}}
                     ],
                     "minimum_should_match": 1
@@ -130,18 +117,14 @@ def build_query_body(q: str) -> dict:
                             }
                         },
                         {
-                            "wildcard": {
-                                "title": {
-                                    "value": "*vin*",
+                            "match": {
+                                "title.ngram": {
+                                    "query": "vin",
                                     "boost": 5.0
                                 }
                             }
                         }
                     ],
-                    "must_not": [
-                        {"match_phrase": {"title": "Главное за день"}},
-                        {"match_phrase": {"title": "главное за день"}}
-                    ],
                     "minimum_should_match": 1
                 }
             }
@@ -152,6 +135,30 @@ def build_query_body(q: str) -> dict:
         year_match = re.search(r'\b(202[4-7])\b', q)
         year = year_match.group(1) if year_match else ""
 
+        if year_filter:
+            return {
+                "query": {
+                    "bool": {
+                        "should": [
+                            {"match": {"title": {"query": "цена", "boost": 4.0}}},
+                            {"match": {"title": {"query": "стоимость", "boost": 4.0}}},
+                            {
+                                "multi_match": {
+                                    "query": "цена стоимость",
+                                    "fields": fields,
+                                    "operator": "or",
+                                    "boost": 2.0
+                                }
+                            }
+                        ],
+                        "minimum_should_match": 1,
+                        # Год - фильтр по дате статьи: поиск идёт только по разделу этого года
+                        "filter": [{"term": {"year": int(year)}}]
+                    }
+                }
+            }
+
+        # В индексе нет поля year (версия до разбиения) - год ищется в заголовке
         return {
             "query": {
                 "bool": {
@@ -183,10 +190,6 @@ def build_query_body(q: str) -> dict:
                             }
                         }
                     ],
-                    "must_not": [
-                        {"match_phrase": {"title": "Главное за день"}},
-                        {"match_phrase": {"title": "главное за день"}}
-                    ],
                     "minimum_should_match": 1
                 }
             }
@@ -194,10 +197,16 @@ def build_query_body(q: str) -> dict:
 
     # 4. ОБЩАЯ ЛОГИКА для остальных запросов
     else:
+        # Временной контекст для любых запросов с годами: год - фильтр, в тексте его не требуем
+        year_match = re.search(r'\b(202[4-7])\b', q)
+        filter_year = year_match if year_filter else None
+        filters = [{"term": {"year": int(filter_year.group(1))}}] if filter_year else []
+        q_text = " ".join(q.replace(filter_year.group(1), "").split()) if filter_year else q
+
         should_queries = [
             {
                 "multi_match": {
-                    "query": q,
+                    "query": q_text or q,
                     "fields": fields,
                     "operator": "and",
                     "fuzziness": "AUTO",
@@ -206,14 +215,11 @@ def build_query_body(q: str) -> dict:
             }
         ]
 
-        # Временной контекст для любых запросов с годами
-        year_match = re.search(r'\b(202[4-7])\b', q)
-        if year_match:
-            year = year_match.group(1)
+        if year_match and not filter_year:
             should_queries.append({
                 "match_phrase": {
                     "title": {
-                        "query": year,
+                        "query": year_match.group(1),
                         "boost": 3.0
                     }
                 }
@@ -236,32 +242,45 @@ def build_query_body(q: str) -> dict:
                 "bool": {
                     "should": should_queries,
                     "minimum_should_match": 1,
-                    "must_not": [
-                        {"match_phrase": {"title": "Главное за день"}},
-                        {"match_phrase": {"title": "главное за день"}}
-                    ]
+                    "filter": filters
                 }
             }
         }
 
 
 def es_search(query: str, size: int = 10):
-    body = build_query_body(query)
-    r = requests.get(
-        f"{ES_URL}/{INDEX_NAME}/_search",
-        json=body,
-        auth=AUTH,
-        params={"size": size},
-    )
-    r.raise_for_status()
-    return r.json()
+    searcher = get_searcher()
+    body = build_query_body(query, year_filter_enabled(searcher))
+    return cached_search(searcher, body, size=size, **search_scope(body, searcher))
+
+
+# Все запросы одним пакетом (_msearch); ответ или {"error": ...} - в порядке queries
+def es_msearch(queries: list[str], size: int = 10) -> list[dict]:
+    searcher = get_searcher()
+    year_filter = year_filter_enabled(searcher)
+    searches = []
+    for q in queries:
+        body = build_query_body(q, year_filter)
+        searches.append((body, {"size": size, **search_scope(body, searcher)}))
+    return cached_msearch(searcher, searches)
 
 
 def main():
-    output_file = "search_results_after_improvements.csv"
+    parser = argparse.ArgumentParser(description="Сбор выдачи после улучшений поиска")
+    parser.add_argument("--queries", help="файл с запросами, по одному в строке (по умолчанию TEST_QUERIES)")
+    parser.add_argument("--output", default="search_results_after_improvements.csv")
+    parser.add_argument("--size", type=int, default=10, help="результатов на запрос")
+    args = parser.parse_args()
+    output_file = args.output
+    queries = load_queries(args.queries, TEST_QUERIES)
 
     print("🔍 Сбор результатов ПОСЛЕ улучшений...")
-    print(f"📝 Запросы: {len(TEST_QUERIES)}")
+    print(f"📝 Запросы: {len(queries)}")
+
+    start = time.perf_counter()
+    responses = es_msearch(queries, size=args.size)
+    errors = sum(1 for resp in responses if "error" in resp)
+    print(f"⏱ Поиск: {time.perf_counter() - start:.1f} с, ошибок: {errors}")
 
     with open(output_file, 'w', newline='', encoding='utf-8-sig') as csvfile:
         writer = csv.writer(csvfile)
@@ -269,11 +288,10 @@ def main():
 
         total_results = 0
 
-        for query in TEST_QUERIES:
-            print(f"Обрабатываю запрос: '{query}'")
-
+        for query, resp in zip(queries, responses):
             try:
-                resp = es_search(query, size=10)
+                if "error" in resp:
+                    raise RuntimeError(resp["error"])
                 hits = resp.get("hits", {}).get("hits", [])
 
                 for hit in hits:
@@ -298,6 +316,7 @@ def main():
 
     print(f"\n✅ Готово! Собрано {total_results} результатов после улучшений")
     print(f"📁 Файл: {output_file}")
+    print(get_cache().format_stats())
 
 
 if __name__ == "__main__":
@@ -1,12 +1,11 @@
+import argparse
 import csv
 import json
+import time
 from pathlib import Path
-import requests
 
-
-ES_URL = "http://localhost:9200"
-INDEX_NAME = "autoru_mag"
-AUTH = ("admin", "StrongPassw0rd!")
+from local_search import get_searcher
+from search_cache import cached_msearch, cached_search, get_cache
 
 
 TEST_QUERIES = [
@@ -65,11 +64,7 @@ def build_query_body(q: str) -> dict:
         "query": {
             "bool": {
                 "should": should_queries,
-                "minimum_should_match": 1,
-                "must_not": [
-                    {"match_phrase": {"title": "Главное за день"}},
-                    {"match_phrase": {"title": "главное за день"}}
-                ]
+                "minimum_should_match": 1
             }
         }
     }
@@ -100,21 +95,37 @@ def build_synonym_query(q: str) -> str | None:
 
 def es_search(query: str, size: int = 10):
     body = build_query_body(query)
-    r = requests.get(
-        f"{ES_URL}/{INDEX_NAME}/_search",
-        json=body,
-        auth=AUTH,
-        params={"size": size},
-    )
-    r.raise_for_status()
-    return r.json()
+    return cached_search(get_searcher(), body, size=size)
+
+
+# Все запросы одним пакетом (_msearch); ответ или {"error": ...} - в порядке queries
+def es_msearch(queries: list[str], size: int = 10) -> list[dict]:
+    return cached_msearch(get_searcher(), [(build_query_body(q), {"size": size}) for q in queries])
+
+
+def load_queries(path: str | None, default: list[str] = TEST_QUERIES) -> list[str]:
+    if not path:
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
 
 
 def main():
-    output_file = "search_results_for_labeling.csv"
+    parser = argparse.ArgumentParser(description="Сбор выдачи для ручной разметки")
+    parser.add_argument("--queries", help="файл с запросами, по одному в строке (по умолчанию TEST_QUERIES)")
+    parser.add_argument("--output", default="search_results_for_labeling.csv")
+    parser.add_argument("--size", type=int, default=10, help="результатов на запрос")
+    args = parser.parse_args()
+    output_file = args.output
+    queries = load_queries(args.queries)
 
     print(" Сбор результатов поиска для разметки...")
-    print(f" Запросы: {len(TEST_QUERIES)}")
+    print(f" Запросы: {len(queries)}")
+
+    start = time.perf_counter()
+    responses = es_msearch(queries, size=args.size)
+    errors = sum(1 for resp in responses if "error" in resp)
+    print(f" Поиск: {time.perf_counter() - start:.1f} с, ошибок: {errors}")
 
     with open(output_file, 'w', newline='', encoding='utf-8-sig') as csvfile:
         writer = csv.writer(csvfile)
@@ -122,11 +133,10 @@ def main():
 
         total_results = 0
 
-        for query in TEST_QUERIES:
-            print(f"Обрабатываю запрос: '{query}'")
-
+        for query, resp in zip(queries, responses):
             try:
-                resp = es_search(query, size=10)
+                if "error" in resp:
+                    raise RuntimeError(resp["error"])
                 hits = resp.get("hits", {}).get("hits", [])
 
                 for hit in hits:
@@ -154,6 +164,7 @@ def main():
 
     print(f"\n Готово! Собрано {total_results} результатов")
     print(f" Файл: {output_file}")
+    print(get_cache().format_stats())
     print("\n Инструкция по разметке:")
     print("1. Откройте CSV файл в Excel или Google Sheets")
     print("2. В столбце 'Релевантность' проставьте:")
@@ -0,0 +1,342 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from itertools import groupby
+
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+from checkpoint import ResumeCheckpoint
+
+
+CORPUS_DIR = "src/storage/corpus"
+INDEX_FILE = "index.sqlite"
+SHARD_MAX_BYTES = 64 * 2**20
+GROUP_SIZE = 64
+FLUSH_INTERVAL = 2.0
+ZSTD_LEVEL = 6
+
+
+def _require_zstd():
+    if zstd is None:
+        raise RuntimeError("Для сжатого хранилища нужен пакет zstandard (pip install zstandard)")
+
+
+def shard_name(n: int) -> str:
+    return f"shard-{n:05d}.jsonl.zst"
+
+
+def encode_record(item: dict) -> bytes:
+    return (json.dumps(item, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+# Старый формат: один JSONL + журнал ResumeCheckpoint. Групповая фиксация:
+# данные и журнал сбрасываются раз в group_size записей или flush_interval секунд
+class JsonlWriter:
+    def __init__(self, path: str, group_size: int = 1, flush_interval: float = FLUSH_INTERVAL,
+                 fsync: bool = False):
+        self.path = path
+        self.group_size = max(1, group_size)
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.checkpoint = ResumeCheckpoint(path).open()
+        self._out = open(path, "ab")
+        self._pending: list[tuple[str, int]] = []
+        self._last_flush = time.monotonic()
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.checkpoint
+
+    def __len__(self) -> int:
+        return len(self.checkpoint)
+
+    def write(self, item: dict):
+        self._out.write(encode_record(item))
+        self._pending.append((item["url"], self._out.tell()))
+        if len(self._pending) >= self.group_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._out.flush()
+        if self.fsync:
+            os.fsync(self._out.fileno())
+        # Журнал обновляется строго после записи документов
+        for url, end in self._pending:
+            self.checkpoint.record(url, end)
+        self._pending.clear()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self._out.close()
+        self.checkpoint.close()
+
+
+# Сжатые шарды: каждая группа записей - отдельный zstd-фрейм в текущем шарде,
+# индекс url -> (шард, смещение фрейма, длина фрейма, номер строки) лежит в SQLite.
+# Для чтения одного документа распаковывается только его фрейм. Писатель
+# создаётся в главном потоке, а пишет из потока стадии write - доступ под замком
+class ShardedCorpusWriter:
+    def __init__(self, directory: str = CORPUS_DIR, shard_max_bytes: int = SHARD_MAX_BYTES,
+                 group_size: int = GROUP_SIZE, flush_interval: float = FLUSH_INTERVAL,
+                 fsync: bool = False, level: int = ZSTD_LEVEL):
+        _require_zstd()
+        self.directory = directory
+        self.shard_max_bytes = shard_max_bytes
+        self.group_size = max(1, group_size)
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self._compressor = zstd.ZstdCompressor(level=level)
+        self._buffer: list[tuple[str, bytes]] = []
+        self._buffered_urls: set[str] = set()
+        self._last_flush = time.monotonic()
+        self._lock = threading.RLock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._db = open_index(directory, check_same_thread=False)
+        self._count = self._db.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+        self._shard, end = self._repair()
+        self._out = open(os.path.join(directory, shard_name(self._shard)), "ab")
+
+    # Фрейм мог записаться, а индекс - нет: такой хвост шарда отрезаем,
+    # а шарды новее последнего проиндексированного удаляем
+    def _repair(self) -> tuple[int, int]:
+        row = self._db.execute(
+            "SELECT shard, MAX(frame_offset + frame_len) FROM docs "
+            "WHERE shard = (SELECT MAX(shard) FROM docs)"
+        ).fetchone()
+        shard, end = (row[0], row[1]) if row[0] is not None else (0, 0)
+        orphan = os.path.join(self.directory, shard_name(shard + 1))
+        if os.path.exists(orphan):
+            print(f"[WARN] Удалён незафиксированный шард {orphan}")
+            os.remove(orphan)
+        path = os.path.join(self.directory, shard_name(shard))
+        if os.path.exists(path) and os.path.getsize(path) > end:
+            print(f"[WARN] Отрезан незафиксированный хвост {path}: {os.path.getsize(path) - end} байт")
+            with open(path, "rb+") as f:
+                f.truncate(end)
+        return shard, end
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            if url in self._buffered_urls:
+                return True
+            return self._db.execute("SELECT 1 FROM docs WHERE url = ?", (url,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count + len(self._buffer)
+
+    def write(self, item: dict):
+        with self._lock:
+            self._buffer.append((item["url"], encode_record(item)))
+            self._buffered_urls.add(item["url"])
+            if len(self._buffer) >= self.group_size or time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+
+        if self._out.tell() >= self.shard_max_bytes:
+            self._out.close()
+            self._shard += 1
+            self._out = open(os.path.join(self.directory, shard_name(self._shard)), "ab")
+
+        frame = self._compressor.compress(b"".join(data for _, data in self._buffer))
+        offset = self._out.tell()
+        urls = {url for url, _ in self._buffer}
+        try:
+            self._out.write(frame)
+            self._out.flush()
+            if self.fsync:
+                os.fsync(self._out.fileno())
+            known = sum(
+                self._db.execute("SELECT 1 FROM docs WHERE url = ?", (url,)).fetchone() is not None
+                for url in urls
+            )
+            # Повторная загрузка URL (--refresh) перезаписывает ссылку на последнюю версию
+            self._db.executemany(
+                "INSERT OR REPLACE INTO docs (url, shard, frame_offset, frame_len, line) VALUES (?, ?, ?, ?, ?)",
+                [(url, self._shard, offset, len(frame), i) for i, (url, _) in enumerate(self._buffer)],
+            )
+            self._db.commit()
+        except Exception:
+            # Группа не зафиксирована: фрейм без индекса отрезаем, чтобы не
+            # записать те же документы повторно при следующем сбросе
+            self._db.rollback()
+            self._out.seek(offset)
+            self._out.truncate(offset)
+            raise
+        else:
+            self._count += len(urls) - known
+        finally:
+            self._buffer.clear()
+            self._buffered_urls.clear()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._out.close()
+            self._db.close()
+
+
+def open_index(directory: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    db = sqlite3.connect(os.path.join(directory, INDEX_FILE), check_same_thread=check_same_thread)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS docs (
+            url TEXT PRIMARY KEY,
+            shard INTEGER NOT NULL,
+            frame_offset INTEGER NOT NULL,
+            frame_len INTEGER NOT NULL,
+            line INTEGER NOT NULL
+        )
+        """
+    )
+    db.commit()
+    return db
+
+
+class CorpusReader:
+    def __init__(self, directory: str = CORPUS_DIR):
+        _require_zstd()
+        self.directory = directory
+        self._db = open_index(directory)
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def shards(self) -> list[str]:
+        rows = self._db.execute("SELECT DISTINCT shard FROM docs ORDER BY shard").fetchall()
+        return [os.path.join(self.directory, shard_name(r[0])) for r in rows]
+
+    # Потоковое чтение по индексу: каждый фрейм распаковывается один раз и
+    # отдаются только строки, на которые ссылается индекс, - без
+    # незафиксированных фреймов и старых версий URL после --refresh
+    def __iter__(self):
+        rows = self._db.execute(
+            "SELECT shard, frame_offset, frame_len, line FROM docs ORDER BY shard, frame_offset, line"
+        ).fetchall()
+        decompressor = zstd.ZstdDecompressor()
+        f, current = None, None
+        try:
+            for (shard, offset, length), group in groupby(rows, key=lambda r: r[:3]):
+                if shard != current:
+                    if f is not None:
+                        f.close()
+                    f = open(os.path.join(self.directory, shard_name(shard)), "rb")
+                    current = shard
+                f.seek(offset)
+                lines = decompressor.decompress(f.read(length)).split(b"\n")
+                for *_, line in group:
+                    yield json.loads(lines[line])
+        finally:
+            if f is not None:
+                f.close()
+
+    def get(self, url: str) -> dict | None:
+        row = self._db.execute(
+            "SELECT shard, frame_offset, frame_len, line FROM docs WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        shard, offset, length, line = row
+        with open(os.path.join(self.directory, shard_name(shard)), "rb") as f:
+            f.seek(offset)
+            frame = f.read(length)
+        lines = zstd.ZstdDecompressor().decompress(frame).split(b"\n")
+        return json.loads(lines[line])
+
+    def close(self):
+        self._db.close()
+
+
+def iter_jsonl(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+# Единая точка чтения корпуса для потребителей: каталог - шарды, файл - JSONL
+def iter_documents(path: str):
+    if os.path.isdir(path):
+        reader = CorpusReader(path)
+        try:
+            yield from reader
+        finally:
+            reader.close()
+    else:
+        yield from iter_jsonl(path)
+
+
+def convert(src: str, directory: str, group_size: int = GROUP_SIZE):
+    writer = ShardedCorpusWriter(directory, group_size=group_size, flush_interval=float("inf"))
+    src_bytes = os.path.getsize(src)
+    converted = 0
+    try:
+        for doc in iter_jsonl(src):
+            if doc.get("url"):
+                writer.write(doc)
+                converted += 1
+    finally:
+        writer.close()
+
+    dst_bytes = sum(
+        os.path.getsize(os.path.join(directory, name))
+        for name in os.listdir(directory) if name.endswith(".zst")
+    )
+    print(f"Сконвертировано документов: {converted}")
+    print(f"JSONL: {src_bytes / 2**20:.1f} МБ -> шарды: {dst_bytes / 2**20:.1f} МБ "
+          f"(x{src_bytes / max(dst_bytes, 1):.1f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сжатое шардированное хранилище корпуса")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_convert = sub.add_parser("convert", help="перелить JSONL в шарды")
+    p_convert.add_argument("src", nargs="?", default="src/storage/data_auto.jsonl")
+    p_convert.add_argument("dst", nargs="?", default=CORPUS_DIR)
+    p_convert.add_argument("--group-size", type=int, default=GROUP_SIZE)
+
+    p_get = sub.add_parser("get", help="достать один документ по URL")
+    p_get.add_argument("url")
+    p_get.add_argument("--dir", default=CORPUS_DIR)
+
+    p_stats = sub.add_parser("stats", help="число документов и шардов")
+    p_stats.add_argument("--dir", default=CORPUS_DIR)
+
+    args = parser.parse_args()
+    if args.cmd == "convert":
+        convert(args.src, args.dst, args.group_size)
+    elif args.cmd == "get":
+        reader = CorpusReader(args.dir)
+        doc = reader.get(args.url)
+        print(json.dumps(doc, ensure_ascii=False, indent=2) if doc else "Не найдено")
+        reader.close()
+    else:
+        reader = CorpusReader(args.dir)
+        print(f"Документов: {len(reader)}, шардов: {len(reader.shards())}")
+        reader.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import argparse
+import hashlib
+import re
+from collections import defaultdict
+
+import numpy as np
+
+from corpus_storage import iter_documents
+
+
+SHINGLE_SIZE = 3
+MAX_HAMMING = 5
+BANDS = MAX_HAMMING + 1
+# Границы полос: 64 бита делятся на BANDS почти равных непрерывных отрезков
+BAND_EDGES = [round(64 * i / BANDS) for i in range(BANDS + 1)]
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Дайджесты вроде «Главное за день» дублируют обычные новости и в индекс не попадают
+DROP_TITLE_PATTERNS = [re.compile(r"главное за день", re.I)]
+
+
+def shingle_hashes(text: str) -> np.ndarray:
+    tokens = TOKEN_RE.findall(text.lower())
+    if len(tokens) < SHINGLE_SIZE:
+        tokens = tokens + [""] * (SHINGLE_SIZE - len(tokens))
+    shingles = {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+    digests = b"".join(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest() for s in shingles)
+    return np.frombuffer(digests, dtype=np.uint64)
+
+
+# 64-битный SimHash: для каждого бита - голосование всех шинглов документа
+def simhash(text: str) -> int:
+    hashes = shingle_hashes(text)
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(hashes)
+    packed = np.packbits(votes > 0, bitorder="little")
+    return int.from_bytes(packed.tobytes(), "little")
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def band_keys(fp: int) -> list[tuple[int, int]]:
+    keys = []
+    for band in range(BANDS):
+        lo, hi = BAND_EDGES[band], BAND_EDGES[band + 1]
+        keys.append((band, (fp >> lo) & ((1 << (hi - lo)) - 1)))
+    return keys
+
+
+def is_digest(doc: dict) -> bool:
+    title = doc.get("title") or ""
+    return any(p.search(title) for p in DROP_TITLE_PATTERNS)
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent: dict[int, int] = {}
+
+    def find(self, x: int) -> int:
+        root = x
+        while self.parent.get(root, root) != root:
+            root = self.parent[root]
+        while x != root:
+            self.parent[x], x = root, self.parent.get(x, x)
+        return root
+
+    def union(self, a: int, b: int):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[rb] = ra
+
+
+# Ищет кластеры почти-дубликатов за ~O(n): отпечаток делится на BANDS полос, и пара
+# с расстоянием Хэмминга <= MAX_HAMMING обязательно совпадает хотя бы в одной полосе,
+# поэтому сравниваются только документы из общих корзин
+def find_clusters(fingerprints: list[int]) -> list[list[int]]:
+    buckets: dict[tuple[int, int], list[int]] = defaultdict(list)
+    uf = _UnionFind()
+
+    for i, fp in enumerate(fingerprints):
+        checked = set()
+        for key in band_keys(fp):
+            for j in buckets[key]:
+                if j not in checked:
+                    checked.add(j)
+                    if hamming(fp, fingerprints[j]) <= MAX_HAMMING:
+                        uf.union(j, i)
+            buckets[key].append(i)
+
+    clusters: dict[int, list[int]] = defaultdict(list)
+    for i in range(len(fingerprints)):
+        clusters[uf.find(i)].append(i)
+    return [c for c in clusters.values() if len(c) > 1]
+
+
+# Те же корзины LSH, но пополняемые по одному документу - для --follow:
+# новая статья сверяется с уже проиндексированными каноническими
+class SimHashIndex:
+    def __init__(self):
+        self.buckets: dict[tuple[int, int], list[int]] = defaultdict(list)
+        self.fingerprints: list[int] = []
+        self.urls: list[str] = []
+
+    # URL почти-дубликата с другим адресом или None
+    def near_duplicate(self, url: str, fp: int) -> str | None:
+        for key in band_keys(fp):
+            for j in self.buckets.get(key, ()):
+                if self.urls[j] != url and hamming(fp, self.fingerprints[j]) <= MAX_HAMMING:
+                    return self.urls[j]
+        return None
+
+    def add(self, url: str, fp: int):
+        i = len(self.urls)
+        self.urls.append(url)
+        self.fingerprints.append(fp)
+        for key in band_keys(fp):
+            self.buckets[key].append(i)
+
+
+# Каноническая версия кластера - самая ранняя публикация, при равенстве - самый длинный текст
+def _canonical_key(meta: tuple) -> tuple:
+    url, date, length = meta
+    return (date or "9999", -length, url)
+
+
+# index - если передан, в него попадают отпечатки канонических документов
+def canonical_urls(path: str, index: SimHashIndex | None = None):
+    metas = []
+    fingerprints = []
+    digests = 0
+    for doc in iter_documents(path):
+        url = doc.get("url")
+        if not url:
+            continue
+        if is_digest(doc):
+            digests += 1
+            continue
+        text = doc.get("text") or ""
+        metas.append((url, doc.get("date"), len(text)))
+        fingerprints.append(simhash(text))
+
+    keep = {m[0] for m in metas}
+    clusters = find_clusters(fingerprints)
+    for cluster in clusters:
+        members = sorted((metas[i] for i in cluster), key=_canonical_key)
+        for url, _, _ in members[1:]:
+            keep.discard(url)
+        # Тот же URL мог встретиться дважды (повторный обход) - канонический оставляем
+        keep.add(members[0][0])
+
+    if index is not None:
+        added = set()
+        for (url, _, _), fp in zip(metas, fingerprints):
+            if url in keep and url not in added:
+                added.add(url)
+                index.add(url, fp)
+
+    report = {
+        "docs": len(metas) + digests,
+        "digests": digests,
+        "clusters": len(clusters),
+        "duplicates": len(metas) - len(keep),
+        "examples": [[metas[i][0] for i in c[:3]] for c in clusters[:5]],
+    }
+    return keep, report
+
+
+def print_report(report: dict):
+    print(f"Документов: {report['docs']}")
+    print(f"Дайджестов отброшено: {report['digests']}")
+    print(f"Кластеров почти-дубликатов: {report['clusters']}, лишних копий: {report['duplicates']}")
+    for example in report["examples"]:
+        print("  ~ " + "\n    ".join(example))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Поиск почти-дубликатов в корпусе (SimHash + LSH)")
+    parser.add_argument("path", nargs="?", default="src/storage/data_auto.jsonl")
+    args = parser.parse_args()
+
+    _, report = canonical_urls(args.path)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
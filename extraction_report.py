@@ -0,0 +1,73 @@
+import argparse
+import json
+
+from bench_parsers import FIXTURES_DIR, load_fixtures
+from html_parsing import DEFAULT_BACKEND, available_backends, parse_article_html
+from opensearch_client import get_client
+
+
+def record_bytes(item: dict | None) -> int:
+    if not item:
+        return 0
+    return len((json.dumps(item, ensure_ascii=False) + "\n").encode("utf-8"))
+
+
+def index_store_bytes(index: str) -> int | None:
+    r = get_client().get(
+        f"_cat/indices/{index}",
+        params={"format": "json", "bytes": "b", "h": "index,store.size,docs.count"},
+    )
+    if r.status_code == 404:
+        return None
+    r.raise_for_status()
+    return sum(int(row.get("store.size") or 0) for row in r.json())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сколько места экономит извлечение тела статьи")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--parser", choices=available_backends(), default=DEFAULT_BACKEND)
+    parser.add_argument("--index-before", default=None, help="индекс, собранный из полного текста страниц")
+    parser.add_argument("--index-after", default=None, help="индекс, собранный из извлечённого тела")
+    args = parser.parse_args()
+
+    docs = load_fixtures(args.fixtures)
+    if not docs:
+        print(f"Нет HTML-фикстур в {args.fixtures}")
+        return
+
+    total_before = total_after = compared = 0
+    print(f"{'Файл':<24} {'до, Б':>9} {'после, Б':>9} {'разница':>9} {'слов':>6}")
+    print("-" * 62)
+    for name, html in docs:
+        before = parse_article_html(html, name, 0, backend=args.parser, full_text=True)
+        after = parse_article_html(html, name, 0, backend=args.parser)
+        if not before or not after:
+            continue
+        b, a = record_bytes(before), record_bytes(after)
+        total_before += b
+        total_after += a
+        compared += 1
+        print(f"{name:<24} {b:>9} {a:>9} {a / b - 1:>+9.1%} {after['word_count']:>6}")
+
+    if not compared:
+        print("Ни одна фикстура не разобралась")
+        return
+
+    print("-" * 62)
+    print(f"Документов: {compared}")
+    print(f"JSONL до: {total_before} Б, после: {total_after} Б "
+          f"(экономия {(total_before - total_after) / compared:.0f} Б/док, {total_after / total_before - 1:+.1%})")
+
+    if args.index_before and args.index_after:
+        size_before = index_store_bytes(args.index_before)
+        size_after = index_store_bytes(args.index_after)
+        if size_before and size_after:
+            print(f"Индекс {args.index_before}: {size_before / 2**20:.1f} МБ, "
+                  f"{args.index_after}: {size_after / 2**20:.1f} МБ ({size_after / size_before - 1:+.1%})")
+        else:
+            print("[WARN] Не удалось получить размеры индексов")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+META_DB = "src/storage/fetch_meta.sqlite"
+
+DAY = 24 * 3600
+INITIAL_REVISIT = 7 * DAY
+MIN_REVISIT = 1 * DAY
+MAX_REVISIT = 60 * DAY
+
+
+def body_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+# Метаданные загрузки по URL для повторного обхода. Интервал повторного визита
+# адаптивный: статья изменилась - интервал вдвое короче, не изменилась - вдвое длиннее
+class FetchMetaStore:
+    def __init__(self, path: str = META_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS fetch_meta (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body_hash TEXT,
+                fetched_at REAL,
+                revisit REAL NOT NULL,
+                next_due REAL NOT NULL,
+                changes INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS fetch_meta_due ON fetch_meta(next_due)")
+        self._db.commit()
+
+    def get(self, url: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified, body_hash, fetched_at, revisit FROM fetch_meta WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("etag", "last_modified", "body_hash", "fetched_at", "revisit"), row))
+
+    # URL из старого корпуса, о которых ещё нет метаданных, становятся «к обходу» сразу
+    def seed(self, urls):
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO fetch_meta (url, revisit, next_due) VALUES (?, ?, 0)",
+                ((u, INITIAL_REVISIT) for u in urls),
+            )
+            self._db.commit()
+
+    def due(self, now: float | None = None, limit: int | None = None) -> list[str]:
+        now = time.time() if now is None else now
+        sql = "SELECT url FROM fetch_meta WHERE next_due <= ? ORDER BY next_due"
+        params = [now]
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return [row[0] for row in self._db.execute(sql, params)]
+
+    def conditional_headers(self, url: str) -> dict:
+        meta = self.get(url) or {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def update(self, url: str, changed: bool, content_hash: str | None = None,
+               etag: str | None = None, last_modified: str | None = None):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT revisit, body_hash, etag, last_modified FROM fetch_meta WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None or row[1] is None:
+                revisit = INITIAL_REVISIT
+            elif changed:
+                revisit = max(MIN_REVISIT, row[0] / 2)
+            else:
+                revisit = min(MAX_REVISIT, row[0] * 2)
+
+            if row is not None:
+                content_hash = content_hash or row[1]
+                etag = etag or row[2]
+                last_modified = last_modified or row[3]
+
+            self._db.execute(
+                """
+                INSERT INTO fetch_meta (url, etag, last_modified, body_hash, fetched_at, revisit, next_due, changes)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    body_hash = excluded.body_hash,
+                    fetched_at = excluded.fetched_at,
+                    revisit = excluded.revisit,
+                    next_due = excluded.next_due,
+                    changes = changes + excluded.changes
+                """,
+                (url, etag, last_modified, content_hash, now, revisit, now + revisit, int(changed)),
+            )
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,294 @@
+import re
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from dateutil.parser import parse as dtparse
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+from bs4 import BeautifulSoup
+
+
+SKIP_TAGS = ("script", "style", "noscript", "template")
+BLOCK_TAGS = ("p", "h2", "h3", "h4", "li", "blockquote")
+HEADING_TAGS = ("h2", "h3", "h4")
+ARTICLE_SELECTOR = 'article, [itemprop="articleBody"]'
+
+POSITIVE_HINTS = re.compile(r"article|content|text|body|post|story", re.I)
+NEGATIVE_HINTS = re.compile(
+    r"comment|footer|header|nav|menu|sidebar|widget|promo|related|share|social|subscribe|banner|advert",
+    re.I,
+)
+
+MAX_LINK_DENSITY = 0.5
+LEAD_MIN_CHARS = 80
+
+# Текстовый блок страницы: parent/grandparent - ключи родительских контейнеров,
+# hint - оценка контейнера по class/id, in_article - блок внутри <article>/articleBody
+Block = namedtuple("Block", "tag text link_chars parent grandparent hint in_article")
+
+
+def clean_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+def class_hint(attrs: str) -> int:
+    hint = 0
+    if POSITIVE_HINTS.search(attrs):
+        hint += 1
+    if NEGATIVE_HINTS.search(attrs):
+        hint -= 2
+    return hint
+
+
+def _extract_bs4(html: str, full_text: bool):
+    soup = BeautifulSoup(html, "html.parser")
+
+    h1 = soup.find("h1")
+    title_tag = h1 or soup.find("title")
+    title = title_tag.get_text(strip=True) if title_tag else None
+
+    raw_date = None
+    time_tag = soup.find("time")
+    if time_tag:
+        raw_date = time_tag.get("datetime") or time_tag.get_text(strip=True)
+
+    category = None
+    meta_section = soup.find("meta", attrs={"property": "article:section"})
+    if meta_section:
+        category = meta_section.get("content")
+
+    if full_text:
+        return title, h1 is not None, raw_date, category, [], soup.get_text(" ", strip=True)
+
+    article_ids = {id(t) for t in soup.select(ARTICLE_SELECTOR)}
+    blocks = []
+    for el in soup.find_all(BLOCK_TAGS):
+        text = clean_text(el.get_text(" ", strip=True))
+        if not text:
+            continue
+        parent = el.parent
+        grandparent = parent.parent if parent is not None else None
+        attrs = " ".join(parent.get("class", [])) + " " + (parent.get("id") or "")
+        blocks.append(Block(
+            el.name,
+            text,
+            sum(len(a.get_text(" ", strip=True)) for a in el.find_all("a")),
+            id(parent),
+            id(grandparent),
+            class_hint(attrs),
+            any(id(p) in article_ids for p in el.parents),
+        ))
+    page_text = None if blocks else soup.get_text(" ", strip=True)
+    return title, h1 is not None, raw_date, category, blocks, page_text
+
+
+def _lxml_page_text(root) -> str:
+    body = root.find("body")
+    chunks = (body if body is not None else root).xpath(
+        ".//text()[not(ancestor::script or ancestor::style or ancestor::noscript or ancestor::template)]"
+    )
+    return " ".join(c.strip() for c in chunks if c.strip())
+
+
+def _extract_lxml(html: str, full_text: bool):
+    root = lxml.html.document_fromstring(html)
+
+    h1 = root.find(".//h1")
+    title_tag = h1 if h1 is not None else root.find(".//title")
+    title = title_tag.text_content().strip() if title_tag is not None else None
+
+    raw_date = None
+    time_tag = root.find(".//time")
+    if time_tag is not None:
+        raw_date = time_tag.get("datetime") or time_tag.text_content().strip()
+
+    category = None
+    meta_section = root.xpath('//meta[@property="article:section"]/@content')
+    if meta_section:
+        category = meta_section[0]
+
+    if full_text:
+        return title, h1 is not None, raw_date, category, [], _lxml_page_text(root)
+
+    tree = root.getroottree()
+    blocks = []
+    for el in root.iter(*BLOCK_TAGS):
+        text = clean_text(el.text_content())
+        if not text:
+            continue
+        parent = el.getparent()
+        grandparent = parent.getparent() if parent is not None else None
+        attrs = (parent.get("class") or "") + " " + (parent.get("id") or "")
+        blocks.append(Block(
+            el.tag,
+            text,
+            sum(len(clean_text(a.text_content())) for a in el.iter("a")),
+            tree.getpath(parent),
+            tree.getpath(grandparent) if grandparent is not None else None,
+            class_hint(attrs),
+            bool(el.xpath('ancestor::article or ancestor::*[@itemprop="articleBody"]')),
+        ))
+    page_text = None if blocks else _lxml_page_text(root)
+    return title, h1 is not None, raw_date, category, blocks, page_text
+
+
+def _extract_selectolax(html: str, full_text: bool):
+    tree = HTMLParser(html)
+
+    h1 = tree.css_first("h1")
+    title_tag = h1 if h1 is not None else tree.css_first("title")
+    title = title_tag.text(strip=True) if title_tag is not None else None
+
+    raw_date = None
+    time_tag = tree.css_first("time")
+    if time_tag is not None:
+        raw_date = time_tag.attributes.get("datetime") or time_tag.text(strip=True)
+
+    category = None
+    meta_section = tree.css_first('meta[property="article:section"]')
+    if meta_section is not None:
+        category = meta_section.attributes.get("content")
+
+    tree.strip_tags(list(SKIP_TAGS))
+    root = tree.body or tree.root
+
+    def page_text():
+        return clean_text(root.text(separator=" ", strip=True)) if root is not None else ""
+
+    if full_text:
+        return title, h1 is not None, raw_date, category, [], page_text()
+
+    article_ids = {n.mem_id for n in tree.css(ARTICLE_SELECTOR)}
+    blocks = []
+    for el in tree.css(", ".join(BLOCK_TAGS)):
+        text = clean_text(el.text(separator=" ", strip=True))
+        if not text:
+            continue
+        parent = el.parent
+        grandparent = parent.parent if parent is not None else None
+        attrs = (parent.attributes.get("class") or "") + " " + (parent.attributes.get("id") or "")
+
+        in_article = False
+        node = parent
+        while node is not None:
+            if node.mem_id in article_ids:
+                in_article = True
+                break
+            node = node.parent
+
+        blocks.append(Block(
+            el.tag,
+            text,
+            sum(len(clean_text(a.text(separator=" ", strip=True))) for a in el.css("a")),
+            parent.mem_id,
+            grandparent.mem_id if grandparent is not None else None,
+            class_hint(attrs),
+            in_article,
+        ))
+    return title, h1 is not None, raw_date, category, blocks, None if blocks else page_text()
+
+
+BACKENDS = {
+    "selectolax": _extract_selectolax if HTMLParser is not None else None,
+    "lxml": _extract_lxml if lxml is not None else None,
+    "bs4": _extract_bs4,
+}
+
+
+def available_backends() -> list[str]:
+    return [name for name, fn in BACKENDS.items() if fn is not None]
+
+
+DEFAULT_BACKEND = available_backends()[0]
+
+
+def link_density(block: Block) -> float:
+    return block.link_chars / len(block.text) if block.text else 1.0
+
+
+# Выбор контейнера статьи: блоки группируются по родителю (и с половинным весом
+# по деду), вес блока - длина текста без ссылок; <article>/articleBody сужают выбор
+def extract_body(blocks: list[Block]):
+    if any(b.in_article for b in blocks):
+        blocks = [b for b in blocks if b.in_article]
+
+    scores: dict = {}
+    for b in blocks:
+        if b.tag in HEADING_TAGS:
+            continue
+        weight = len(b.text) * (1.0 - link_density(b))
+        scores[b.parent] = scores.get(b.parent, 0.0) + weight * (1.0 + 0.25 * b.hint)
+        if b.grandparent is not None:
+            scores[b.grandparent] = scores.get(b.grandparent, 0.0) + weight * 0.5
+
+    if not scores:
+        return "", None, 0
+
+    best = max(scores, key=scores.get)
+    body_blocks = [
+        b for b in blocks
+        if (b.parent == best or b.grandparent == best) and link_density(b) < MAX_LINK_DENSITY
+    ]
+
+    body = " ".join(b.text for b in body_blocks)
+    lead = next(
+        (b.text for b in body_blocks if b.tag not in HEADING_TAGS and len(b.text) >= LEAD_MIN_CHARS),
+        body_blocks[0].text if body_blocks else None,
+    )
+    return body, lead, len(body.split())
+
+
+def parse_date(raw: str | None):
+    if not raw:
+        return None
+    try:
+        return dtparse(raw).isoformat()
+    except Exception:
+        return raw
+
+
+# full_text=True - старое поведение: весь текст страницы вместе с меню и виджетами
+def parse_article_html(html: str, url: str, min_chars: int, require_h1: bool = False,
+                       backend: str = DEFAULT_BACKEND, full_text: bool = False):
+    extract = BACKENDS.get(backend)
+    if extract is None:
+        raise ValueError(f"Парсер недоступен: {backend} (есть: {', '.join(available_backends())})")
+
+    title, has_h1, raw_date, category, blocks, page_text = extract(html, full_text)
+    if not has_h1 and require_h1:
+        return None
+
+    lead = None
+    if blocks:
+        text, lead, word_count = extract_body(blocks)
+    else:
+        text = page_text or ""
+        word_count = len(text.split())
+
+    if not text or len(text) < min_chars:
+        return None
+
+    result = {
+        "url": url,
+        "title": title,
+        "date": parse_date(raw_date),
+        "author": None,
+        "category": category,
+        "tags": None,
+        "text": text,
+        "lead": lead,
+        "word_count": word_count,
+        "site": "auto.ru",
+        "fetched_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+    return result
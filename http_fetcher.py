@@ -0,0 +1,53 @@
+import asyncio
+import threading
+
+import aiohttp
+
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+
+
+# Пул aiohttp-соединений со своим event loop в фоновом потоке: fetch() можно
+# вызывать из любого воркера, соединения к хосту переиспользуются
+class HttpFetcher:
+    def __init__(self, pool_size: int = 16, per_host: int = 8, timeout: float = 15.0):
+        self.pool_size = pool_size
+        self.per_host = per_host
+        self.timeout = timeout
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._session = self._run(self._open_session())
+
+    async def _open_session(self):
+        connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.per_host)
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"User-Agent": USER_AGENT, "Accept-Language": "ru-RU,ru;q=0.9"},
+        )
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _fetch(self, url: str, headers: dict | None):
+        async with self._session.get(url, headers=headers, allow_redirects=True) as resp:
+            body = await resp.text(errors="replace") if resp.status == 200 else ""
+            return resp.status, body, {k.lower(): v for k, v in resp.headers.items()}
+
+    # (status, html, headers); при сетевой ошибке status = None
+    def fetch(self, url: str, headers: dict | None = None):
+        try:
+            return self._run(self._fetch(url, headers))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return None, "", {"error": str(e)}
+
+    def close(self):
+        try:
+            self._run(self._session.close())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
@@ -1,81 +1,621 @@
+import argparse
+import hashlib
 import json
+import os
 import time
-import requests
+
 from tqdm import tqdm
 
-import urllib3
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from bulk_indexer import BulkIndexer
+from collect_for_labeling import TEST_QUERIES
+from corpus_storage import iter_documents
+from dedupe import SimHashIndex, canonical_urls, is_digest, print_report, simhash
+from fetch_meta import body_hash
+from index_layout import (
+    PARTITION_BY, PARTITIONINGS, doc_year, partition_index, partition_of, route_key, version_of, year_alias,
+)
+from opensearch_client import INDEX_NAME, get_client
+from url_frontier import normalize_url
 
-ES_URL = "http://localhost:9200"
-INDEX_NAME = "autoru_mag"
-DATA_FILE = "data_auto.jsonl"
-AUTH = ("admin", "StrongPassw0rd!")
 
+# Поиск работает через алиас INDEX_NAME, за ним - разделы версии
+# autoru_mag_v<время сборки>_<год|квартал> (index_layout.py)
+VERSION_PREFIX = f"{INDEX_NAME}_v"
+KEEP_VERSIONS = 3
+REPLICAS = 1
+SHARDS = 1
+# JSONL скрапера или каталог со сжатыми шардами (corpus_storage.py)
+DATA_FILE = "src/storage/data_auto.jsonl"
+
+# На время загрузки: без реплик и без периодического refresh
+LOAD_SETTINGS = {"number_of_replicas": 0, "refresh_interval": "-1"}
+MGET_BATCH = 500
+FOLLOW_POLL = 1.0
+# Рядом с JSONL: до какого байта --follow уже дочитал
+FOLLOW_SUFFIX = ".follow"
+SYNONYMS_FILE = "synonyms.json"
+
+client = get_client()
+
+
+# synonyms.json -> правила synonym_graph. Раскрытие одностороннее, как было на
+# клиенте: «автомобиль» находит «машину», но не наоборот
+def synonym_rules(path: str = SYNONYMS_FILE) -> list[str]:
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        synonyms = json.load(f)
+    rules = []
+    for word, alternatives in synonyms.items():
+        terms = [t.strip().lower() for t in [word, *alternatives] if t.strip()]
+        terms = [t for t in dict.fromkeys(terms) if not any(c in t for c in ",=>#")]
+        if len(terms) > 1:
+            rules.append(f"{terms[0]} => {', '.join(terms)}")
+    return rules
 
-def create_index():
-    url = f"{ES_URL}/{INDEX_NAME}"
-    try:
-        resp = requests.head(url, auth=AUTH)
-        if resp.status_code == 200:
-            requests.delete(url, auth=AUTH)
-    except requests.exceptions.ConnectionError:
-        raise RuntimeError("OpenSearch не запущен на http://localhost:9200")
 
-    body = {
+def synonym_filter(path: str = SYNONYMS_FILE) -> dict:
+    # lenient: правило, которое анализатор превращает в пустоту, пропускается, а не ломает индекс
+    return {"type": "synonym_graph", "synonyms": synonym_rules(path) or ["автомобиль => автомобиль"],
+            "lenient": True}
+
+
+# Поля заточены под запросы: title.ngram вместо wildcard *vin*, title.keyword
+# для точных совпадений и сортировки. У title позиции по умолчанию - для фраз;
+# смещения не хранятся, пока нет подсветки, префиксных запросов поиск не строит.
+# lead в фразовых запросах не участвует - позиции для него не хранятся.
+# Синонимы раскрываются только при поиске (ru_search_analyzer), поэтому для
+# их обновления корпус заново не читается - см. reload_synonyms.
+# year заполняется при загрузке и нужен для фильтров, а не для ранжирования.
+# Раскладка версии записывается в _meta - её читают поиск и --follow
+def index_body(partition_by: str = PARTITION_BY, routing: str | None = None, shards: int = SHARDS,
+               settings: dict = LOAD_SETTINGS, synonyms_path: str = SYNONYMS_FILE) -> dict:
+    mappings = {"_meta": {"layout": {"partition_by": partition_by, "routing": routing, "shards": shards}}}
+    if routing:
+        # Без ключа маршрутизации документ ушёл бы в шард по _id и потерялся для поиска по категории
+        mappings["_routing"] = {"required": True}
+    return {
         "settings": {
+            "index": {**settings, "number_of_shards": shards},
             "analysis": {
                 "filter": {
                     "ru_stop": {"type": "stop", "stopwords": "_russian_"},
                     "ru_stemmer": {"type": "stemmer", "language": "russian"},
+                    "ru_synonyms": synonym_filter(synonyms_path),
+                },
+                "tokenizer": {
+                    "trigram": {"type": "ngram", "min_gram": 3, "max_gram": 3,
+                                "token_chars": ["letter", "digit"]},
                 },
                 "analyzer": {
                     "ru_analyzer": {
                         "tokenizer": "standard",
                         "filter": ["lowercase", "ru_stop", "ru_stemmer"],
-                    }
+                    },
+                    "ru_search_analyzer": {
+                        "tokenizer": "standard",
+                        "filter": ["lowercase", "ru_synonyms", "ru_stop", "ru_stemmer"],
+                    },
+                    "trigram_analyzer": {
+                        "tokenizer": "trigram",
+                        "filter": ["lowercase"],
+                    },
                 },
             }
         },
         "mappings": {
+            **mappings,
             "properties": {
-                "title": {"type": "text", "analyzer": "ru_analyzer"},
-                "text": {"type": "text", "analyzer": "ru_analyzer"},
+                "title": {
+                    "type": "text",
+                    "analyzer": "ru_analyzer",
+                    "search_analyzer": "ru_search_analyzer",
+                    "fields": {
+                        "keyword": {"type": "keyword", "ignore_above": 512},
+                        "ngram": {"type": "text", "analyzer": "trigram_analyzer", "index_options": "docs"},
+                    },
+                },
+                "text": {"type": "text", "analyzer": "ru_analyzer", "search_analyzer": "ru_search_analyzer"},
+                "lead": {"type": "text", "analyzer": "ru_analyzer", "search_analyzer": "ru_search_analyzer",
+                         "index_options": "freqs"},
+                "word_count": {"type": "integer"},
+                "year": {"type": "short"},
                 "category": {"type": "keyword"},
                 "date": {"type": "date", "ignore_malformed": True},
                 "url": {"type": "keyword"},
+                "content_hash": {"type": "keyword"},
                 "site": {"type": "keyword"},
                 "fetched_at": {"type": "date", "ignore_malformed": True},
             }
         },
     }
 
-    r = requests.put(url, json=body, auth=AUTH)
-    r.raise_for_status()
 
+def new_version() -> str:
+    return f"{VERSION_PREFIX}{time.strftime('%Y%m%d%H%M%S')}"
+
+
+# Разделы версии создаются по мере загрузки - при первом документе с такой датой.
+# live: версия уже под алиасом (--incremental, --follow), новый раздел сразу
+# попадает в алиас и в алиас своего года
+class Layout:
+    def __init__(self, version: str, partition_by: str = PARTITION_BY, routing: str | None = None,
+                 shards: int = SHARDS, replicas: int = REPLICAS, live: bool = False):
+        self.version = version
+        self.partition_by = partition_by
+        self.routing = routing
+        self.shards = shards
+        self.replicas = replicas
+        self.live = live
+        self.indices = set(version_indices(version))
+        self.aliased = {(index, alias) for index, aliases in alias_targets().items() for alias in aliases} \
+            if live else set()
 
-def bulk_index():
-    with open(DATA_FILE, "r", encoding="utf-8") as f:
-        docs = [json.loads(line) for line in f if line.strip()]
-
-    batch_size = 500
-    for i in tqdm(range(0, len(docs), batch_size), desc="Bulk index"):
-        chunk = docs[i : i + batch_size]
-        lines = []
-        for doc in chunk:
-            meta = {"index": {"_index": INDEX_NAME}}
-            lines.append(json.dumps(meta, ensure_ascii=False))
-            lines.append(json.dumps(doc, ensure_ascii=False))
-        payload = "\n".join(lines) + "\n"
-        r = requests.post(
-            f"{ES_URL}/_bulk",
-            data=payload.encode("utf-8"),
-            headers={"Content-Type": "application/x-ndjson"},
-            auth=AUTH
-        )
+    @classmethod
+    def from_alias(cls, replicas: int = REPLICAS):
+        targets = [index for index, aliases in alias_targets().items() if INDEX_NAME in aliases]
+        if not targets:
+            raise RuntimeError(f"Алиас {INDEX_NAME} не найден - сначала полная индексация")
+        r = client.get(f"{targets[0]}/_mapping")
         r.raise_for_status()
-        time.sleep(0.1)
+        meta = next(iter(r.json().values()))["mappings"].get("_meta", {}).get("layout", {})
+        # Версии до разбиения на разделы - один индекс без _meta
+        return cls(version_of(targets[0]) or targets[0], meta.get("partition_by", "none"), meta.get("routing"),
+                   meta.get("shards", SHARDS), replicas, live=True)
+
+    def target(self, doc: dict) -> tuple[str, str | None]:
+        index = partition_index(self.version, partition_of(doc, self.partition_by))
+        if index not in self.indices:
+            self._create(index)
+        if self.live and doc.get("year") and (index, year_alias(doc["year"])) not in self.aliased:
+            self._add_aliases(index, [year_alias_action(self.version, index, doc["year"])])
+        return index, route_key(doc) if self.routing else None
+
+    def _create(self, index: str):
+        settings = {"number_of_replicas": self.replicas, "refresh_interval": "1s"} if self.live else LOAD_SETTINGS
+        client.put(index, json_body=index_body(self.partition_by, self.routing, self.shards, settings)) \
+            .raise_for_status()
+        self.indices.add(index)
+        if self.live:
+            self._add_aliases(index, [{"add": {"index": index, "alias": INDEX_NAME}}])
+            print(f"\nНовый раздел {index} добавлен в {INDEX_NAME}")
+
+    def _add_aliases(self, index: str, actions: list[dict]):
+        client.post("_aliases", json_body={"actions": actions}).raise_for_status()
+        self.aliased.update((index, a["add"]["alias"]) for a in actions)
+
+
+# В разделе-годе или квартале все статьи одного года - алиас года без фильтра.
+# Неразбитая версия - один индекс, алиас года на нём фильтрованный
+def year_alias_action(version: str, index: str, year: int) -> dict:
+    action = {"index": index, "alias": year_alias(year)}
+    if index == version:
+        action["filter"] = {"term": {"year": year}}
+    return {"add": action}
+
+
+# После загрузки: рабочие настройки, слияние сегментов и прогрев кэшей,
+# чтобы первые запросы после переключения алиаса не были медленными
+def finalize_index(version: str, replicas: int = REPLICAS):
+    pattern = f"{version}*"
+    r = client.put(
+        f"{pattern}/_settings",
+        json_body={"index": {"number_of_replicas": replicas, "refresh_interval": "1s"}},
+    )
+    r.raise_for_status()
+    client.post(f"{pattern}/_refresh").raise_for_status()
+
+    print("Слияние сегментов...")
+    client.post(f"{pattern}/_forcemerge", params={"max_num_segments": 1}, timeout=3600).raise_for_status()
+
+    # На одном узле реплики не размещаются - достаточно жёлтого статуса
+    r = client.get(
+        f"_cluster/health/{pattern}",
+        params={"wait_for_status": "yellow", "timeout": "120s"},
+        timeout=150,
+    )
+    r.raise_for_status()
+
+    for query in TEST_QUERIES:
+        body = {"query": {"multi_match": {"query": query, "fields": ["title^3", "text"]}}}
+        client.search(body, index=pattern, size=10)
+
+    count = client.get(f"{pattern}/_count").json().get("count", 0)
+    print(f"Версия {version} готова: {count} документов в {len(version_indices(version))} разделах")
+    return count
+
+
+# Новые синонимы без простоя: закрывать индекс под алиасом ради смены настроек
+# анализа нельзя - поиск на это время падает. Вместо этого текущая версия
+# копируется на стороне OpenSearch (_reindex, с сохранением маршрутизации) в
+# новую с обновлённым анализатором, и алиасы переключаются одной операцией.
+# Записи, сделанные во время копирования (--follow), в новую версию не попадут -
+# на время обновления --follow лучше остановить
+def reload_synonyms(path: str = SYNONYMS_FILE, replicas: int = REPLICAS, keep: int = KEEP_VERSIONS):
+    current = Layout.from_alias(replicas)
+    # Версия до разбиения на разделы - сам индекс без суффикса
+    sources = sorted(current.indices) or [current.version]
+    version = new_version()
+    print(f"Новая версия {version} из {current.version}: правил синонимов {len(synonym_rules(path))}")
+    try:
+        for source in sources:
+            index = version + source[len(current.version):]
+            body = index_body(current.partition_by, current.routing, current.shards, synonyms_path=path)
+            client.put(index, json_body=body).raise_for_status()
+            r = client.post(
+                "_reindex",
+                json_body={"source": {"index": source}, "dest": {"index": index}},
+                params={"wait_for_completion": "true"},
+                timeout=3600,
+            )
+            r.raise_for_status()
+            result = r.json()
+            if result.get("failures"):
+                raise RuntimeError(f"_reindex {source} -> {index}: {result['failures'][:3]}")
+            print(f"  {source} -> {index}: {result.get('created', 0)} документов")
+        count = finalize_index(version, replicas)
+    except BaseException:
+        delete_version(version)
+        raise
+    if count == 0:
+        delete_version(version)
+        raise RuntimeError("Новая версия индекса пуста - алиас не переключён")
+    swap_alias(version)
+    prune_versions(keep)
+
+
+def _cat_indices(pattern: str) -> list[str]:
+    r = client.get(f"_cat/indices/{pattern}", params={"format": "json", "h": "index"})
+    if r.status_code == 404:
+        return []
+    r.raise_for_status()
+    return [row["index"] for row in r.json()]
+
+
+def list_versions() -> list[str]:
+    versions = {version_of(index) for index in _cat_indices(f"{VERSION_PREFIX}*")}
+    return sorted((v for v in versions if v), reverse=True)
+
+
+def version_indices(version: str) -> list[str]:
+    return sorted(index for index in _cat_indices(f"{version}*") if version_of(index) == version)
+
+
+def delete_version(version: str):
+    indices = version_indices(version)
+    if indices:
+        client.delete(",".join(indices)).raise_for_status()
+
+
+# Индексы под алиасом поиска и алиасами лет: {индекс: [алиасы]}
+def alias_targets() -> dict[str, list[str]]:
+    r = client.get(f"_alias/{INDEX_NAME},{INDEX_NAME}_*")
+    if r.status_code == 404:
+        return {}
+    r.raise_for_status()
+    return {index: list(data.get("aliases", {})) for index, data in r.json().items()}
+
+
+def current_version() -> str | None:
+    for index, aliases in alias_targets().items():
+        if INDEX_NAME in aliases:
+            return version_of(index) or index
+    return None
+
+
+# Какие годы лежат в каждом индексе версии - по ним строятся алиасы лет
+def index_years(version: str) -> dict[str, list[int]]:
+    body = {"size": 0, "aggs": {"indices": {
+        "terms": {"field": "_index", "size": 1000},
+        "aggs": {"years": {"terms": {"field": "year", "size": 1000}}},
+    }}}
+    result = client.search(body, index=f"{version}*")
+    return {
+        bucket["key"]: [int(y["key"]) for y in bucket["years"]["buckets"]]
+        for bucket in result["aggregations"]["indices"]["buckets"]
+    }
+
+
+# Переключение алиасов одной операцией _aliases: запросы видят либо старую
+# версию, либо новую - и через общий алиас, и через алиасы лет.
+# Старый индекс без версии с именем алиаса удаляется там же
+def swap_alias(version: str):
+    actions = []
+    targets = alias_targets()
+    current = current_version()
+    for index, aliases in targets.items():
+        actions.extend({"remove": {"index": index, "alias": alias}} for alias in aliases)
+    if current is None and client.head(INDEX_NAME).status_code == 200:
+        actions.append({"remove_index": {"index": INDEX_NAME}})
+    for index in version_indices(version):
+        actions.append({"add": {"index": index, "alias": INDEX_NAME}})
+    for index, years in index_years(version).items():
+        actions.extend(year_alias_action(version, index, year) for year in years)
+    client.post("_aliases", json_body={"actions": actions}).raise_for_status()
+    print(f"Алиас {INDEX_NAME}: {current or '-'} -> {version}")
+
+
+def prune_versions(keep: int = KEEP_VERSIONS):
+    current = current_version()
+    for version in list_versions()[max(1, keep):]:
+        if version != current:
+            delete_version(version)
+            print(f"Удалена старая версия {version}")
+
+
+def rollback():
+    current = current_version()
+    older = [version for version in list_versions() if current is None or version < current]
+    if not older:
+        raise RuntimeError("Нет более старой версии индекса для отката")
+    swap_alias(older[0])
+
+
+# _id выводится из нормализованного URL: повторная загрузка перезаписывает документ, а не дублирует
+def doc_id(url: str) -> str:
+    return hashlib.sha1(normalize_url(url).encode("utf-8")).hexdigest()
+
+
+def with_hash(doc: dict) -> dict:
+    if not doc.get("content_hash"):
+        doc["content_hash"] = body_hash(doc.get("text") or "")
+    return doc
+
+
+# _mget по алиасу из нескольких индексов не работает - раздел и ключ маршрутизации
+# каждого документа известны заранее и передаются явно
+def stored_hashes(targets: dict[str, dict]) -> dict[str, str]:
+    docs = [{"_id": _id, **target} for _id, target in targets.items()]
+    r = client.post("_mget", json_body={"docs": docs}, params={"_source_includes": "content_hash"})
+    r.raise_for_status()
+    return {
+        d["_id"]: d["_source"].get("content_hash")
+        for d in r.json()["docs"] if d.get("found")
+    }
+
+
+# Где документы лежат сейчас, если не там, куда попали бы по текущим year и
+# category: {_id: цель без _id}. Ищем по всем разделам версии без маршрутизации
+def stored_elsewhere(layout: Layout, ids: list[str]) -> dict[str, dict]:
+    if not ids or not layout.indices:
+        return {}
+    body = {"query": {"ids": {"values": ids}}, "_source": False, "size": len(ids)}
+    result = client.search(body, index=",".join(sorted(layout.indices)), ignore_unavailable="true")
+    return {
+        hit["_id"]: {"_index": hit["_index"], **({"routing": hit["_routing"]} if hit.get("_routing") else {})}
+        for hit in result["hits"]["hits"]
+    }
+
+
+# Отправляет порцию документов в их разделы; документы с тем же content_hash,
+# что уже лежит в индексе, пропускаются. Если у документа сменился год или
+# категория, старая копия в другом разделе или шарде удаляется в том же _bulk
+def index_batch(indexer: BulkIndexer, layout: Layout, docs: list[dict], skip_unchanged: bool) -> int:
+    by_id = {}
+    targets = {}
+    for doc in docs:
+        if not doc.get("url"):
+            continue
+        doc = with_hash(doc)
+        doc["year"] = doc_year(doc)
+        _id = doc_id(doc["url"])
+        index, routing = layout.target(doc)
+        by_id[_id] = doc
+        targets[_id] = {"_index": index, **({"routing": routing} if routing else {})}
+    known = stored_hashes(targets) if skip_unchanged and by_id else {}
+    stale = {}
+    if skip_unchanged and (layout.partition_by != "none" or layout.routing):
+        missing = [_id for _id in by_id if _id not in known]
+        stale = {_id: old for _id, old in stored_elsewhere(layout, missing).items() if old != targets[_id]}
+    skipped = 0
+    for _id, doc in by_id.items():
+        if known.get(_id) == doc["content_hash"]:
+            skipped += 1
+            continue
+        if _id in stale:
+            indexer.add({"delete": {**stale[_id], "_id": _id}})
+        indexer.add({"index": {**targets[_id], "_id": _id}}, doc)
+    return skipped
+
+
+def iter_batches(docs, size: int = MGET_BATCH):
+    batch = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def bulk_index(layout: Layout, path: str = DATA_FILE, skip_unchanged: bool = False):
+    # В индекс идут только канонические версии кластеров почти-дубликатов
+    keep, report = canonical_urls(path)
+    print_report(report)
+
+    # Документы читаются лениво и сразу уходят в пачки - корпус целиком в память не грузится
+    indexer = BulkIndexer(client)
+    skipped = 0
+    try:
+        docs = (doc for doc in tqdm(iter_documents(path), desc="Bulk index", unit="док")
+                if doc.get("url") in keep)
+        for batch in iter_batches(docs):
+            skipped += index_batch(indexer, layout, batch, skip_unchanged)
+    finally:
+        indexer.close()
+    print(indexer.summary())
+    if skip_unchanged:
+        print(f"Без изменений (пропущено): {skipped}")
+
+
+# Хвост JSONL скрапера: отдаёт порции новых записей, как только они дописаны.
+# Файл читается в байтах: запись, сброшенная на диск не целиком, может
+# оборваться посреди многобайтной буквы - декодируются только полные строки.
+# Недописанная строка ждёт продолжения, усечение файла - чтение с начала
+# Вместе с порцией отдаётся смещение сразу за последней полной строкой
+def follow_jsonl(path: str, poll: float = FOLLOW_POLL, size: int = MGET_BATCH, offset: int = 0):
+    while not os.path.exists(path):
+        time.sleep(poll)
+    f = open(path, "rb")
+    f.seek(offset)
+    partial = b""
+    try:
+        while True:
+            batch = []
+            while len(batch) < size:
+                line = f.readline()
+                if not line:
+                    break
+                partial += line
+                if not partial.endswith(b"\n"):
+                    break
+                record, partial = partial.strip(), b""
+                if not record:
+                    continue
+                try:
+                    batch.append(json.loads(record.decode("utf-8")))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    continue
+            if batch:
+                yield batch, f.tell() - len(partial)
+                continue
+            yield [], f.tell() - len(partial)
+            time.sleep(poll)
+            if os.path.getsize(path) < f.tell():
+                print(f"[WARN] {path} усечён - читаю с начала")
+                f.seek(0)
+                partial = b""
+    finally:
+        f.close()
+
+
+def load_follow_offset(path: str) -> int:
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    if not os.path.exists(path + FOLLOW_SUFFIX):
+        # Первый запуск: всё, что уже в файле, попало в индекс при полной сборке
+        return size
+    with open(path + FOLLOW_SUFFIX, "r", encoding="utf-8") as f:
+        offset = int(f.read().strip() or 0)
+    if offset > size:
+        print(f"[WARN] {path} короче сохранённого смещения - читаю с начала")
+        return 0
+    return offset
+
+
+def save_follow_offset(path: str, offset: int):
+    tmp = path + FOLLOW_SUFFIX + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(str(offset))
+    os.replace(tmp, path + FOLLOW_SUFFIX)
+
+
+# Режим --follow: индексирует новые записи скрапера в текущую версию за алиасом.
+# Чтение продолжается с сохранённого смещения (при первом запуске - с конца
+# файла). Дубликаты ловятся по _id и content_hash, почти-дубликаты - по
+# корзинам SimHash канонических документов корпуса, как при полной сборке
+def follow(layout: Layout, path: str = DATA_FILE, poll: float = FOLLOW_POLL):
+    if os.path.isdir(path):
+        raise RuntimeError("--follow работает только с JSONL, не с каталогом шардов")
+    near = SimHashIndex()
+    if os.path.exists(path):
+        canonical_urls(path, near)
+    offset = saved = load_follow_offset(path)
+    indexer = BulkIndexer(client)
+    indexed = skipped = duplicates = 0
+    print(f"Слежу за {path} с байта {offset} (Ctrl+C - выход)")
+    try:
+        for batch, offset in follow_jsonl(path, poll, offset=offset):
+            if not batch:
+                # Простой: дописанное отправляем сразу, не дожидаясь полной пачки
+                indexer.flush()
+                if offset != saved:
+                    save_follow_offset(path, offset)
+                    saved = offset
+                continue
+            docs = []
+            for doc in batch:
+                if not doc.get("url") or is_digest(doc):
+                    continue
+                fp = simhash(doc.get("text") or "")
+                if near.near_duplicate(doc["url"], fp):
+                    duplicates += 1
+                    continue
+                near.add(doc["url"], fp)
+                docs.append(doc)
+            n = index_batch(indexer, layout, docs, skip_unchanged=True)
+            skipped += n
+            indexed += len(docs) - n
+            print(f"\rНовых/изменённых: {indexed}, без изменений: {skipped}, почти-дубликатов: {duplicates}",
+                  end="", flush=True)
+    except KeyboardInterrupt:
+        print()
+    finally:
+        indexer.close()
+        # Смещение сохраняется только после отправки - при сбое порция перечитается,
+        # а повтор безвреден (тот же _id и content_hash)
+        if offset != saved:
+            save_follow_offset(path, offset)
+    print(indexer.summary())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Индексация корпуса в OpenSearch без простоя поиска")
+    parser.add_argument("--keep", type=int, default=KEEP_VERSIONS, help="сколько версий индекса хранить")
+    parser.add_argument("--replicas", type=int, default=REPLICAS, help="число реплик после загрузки")
+    parser.add_argument("--rollback", action="store_true", help="вернуть алиас на предыдущую версию")
+    parser.add_argument("--list", action="store_true", help="показать версии индекса")
+    parser.add_argument("--incremental", action="store_true",
+                        help="дозалить корпус в текущую версию за алиасом, пропуская неизменённые документы")
+    parser.add_argument("--follow", action="store_true",
+                        help="следить за JSONL скрапера и индексировать новые записи за секунды")
+    parser.add_argument("--data", default=DATA_FILE, help="JSONL или каталог шардов корпуса")
+    parser.add_argument("--partition", choices=PARTITIONINGS, default=PARTITION_BY,
+                        help="разбивка новой версии на индексы по дате статьи")
+    parser.add_argument("--route-by-category", action="store_true",
+                        help="маршрутизировать документы по category (имеет смысл при --shards > 1)")
+    parser.add_argument("--shards", type=int, default=SHARDS, help="шардов в каждом разделе")
+    parser.add_argument("--reload-synonyms", action="store_true",
+                        help=f"пересобрать текущую версию с новым {SYNONYMS_FILE} через _reindex "
+                             "и переключить алиас (без простоя поиска)")
+    args = parser.parse_args()
+
+    if args.list:
+        current = current_version()
+        for version in list_versions():
+            partitions = [index[len(version) + 1:] or "-" for index in version_indices(version)]
+            print(f"{'*' if version == current else ' '} {version}  {' '.join(partitions)}")
+        return
+    if args.rollback:
+        rollback()
+        return
+    if args.reload_synonyms:
+        reload_synonyms(replicas=args.replicas, keep=args.keep)
+        return
+    if args.incremental or args.follow:
+        layout = Layout.from_alias(args.replicas)
+        if args.incremental:
+            bulk_index(layout, args.data, skip_unchanged=True)
+        if args.follow:
+            follow(layout, args.data)
+        return
+
+    layout = Layout(new_version(), args.partition, "category" if args.route_by_category else None,
+                    args.shards, args.replicas)
+    print(f"Новая версия индекса: {layout.version} (разделы: {args.partition})")
+    try:
+        bulk_index(layout, args.data)
+        count = finalize_index(layout.version, args.replicas) if layout.indices else 0
+    except BaseException:
+        # Недостроенная версия не должна попасть под алиас или вытеснить рабочие
+        delete_version(layout.version)
+        raise
+    if count == 0:
+        delete_version(layout.version)
+        raise RuntimeError("Новая версия индекса пуста - алиас не переключён")
+    swap_alias(layout.version)
+    prune_versions(args.keep)
 
 
 if __name__ == "__main__":
-    create_index()
-    bulk_index()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,121 @@
+import re
+import time
+
+from opensearch_client import INDEX_NAME, SearchClient
+
+
+# Версия индекса разбивается на разделы по дате статьи: autoru_mag_v<время>_2025
+# (по годам) или autoru_mag_v<время>_2025q3 (по кварталам). Статьи без даты -
+# в разделе undated. partition_by=none - вся версия одним индексом, как раньше
+PARTITIONINGS = ("year", "quarter", "none")
+PARTITION_BY = "year"
+UNDATED = "undated"
+# При маршрутизации по категории ключ нужен каждому документу
+NO_CATEGORY = "_none"
+LAYOUT_TTL = 60.0
+
+DATE_RE = re.compile(r"^(\d{4})-(\d{2})")
+VERSION_RE = re.compile(rf"^({re.escape(INDEX_NAME)}_v\d{{14}})(?:_(\w+))?$")
+
+
+def doc_year(doc: dict) -> int | None:
+    m = DATE_RE.match(doc.get("date") or "")
+    return int(m.group(1)) if m else None
+
+
+def partition_of(doc: dict, partition_by: str = PARTITION_BY) -> str | None:
+    if partition_by == "none":
+        return None
+    m = DATE_RE.match(doc.get("date") or "")
+    if not m:
+        return UNDATED
+    year, month = m.groups()
+    return year if partition_by == "year" else f"{year}q{(int(month) - 1) // 3 + 1}"
+
+
+def partition_index(version: str, partition: str | None) -> str:
+    return version if partition is None else f"{version}_{partition}"
+
+
+def version_of(index: str) -> str | None:
+    m = VERSION_RE.match(index)
+    return m.group(1) if m else None
+
+
+# Алиас года: autoru_mag_2025 -> разделы этого года текущей версии
+def year_alias(year: int | str) -> str:
+    return f"{INDEX_NAME}_{year}"
+
+
+def route_key(doc: dict) -> str:
+    return doc.get("category") or NO_CATEGORY
+
+
+# Значения term/terms по полю из filter верхнего bool: по ним запрос сужается до разделов
+def filter_values(body: dict, field: str) -> list:
+    clauses = body.get("query", {}).get("bool", {}).get("filter") or []
+    if isinstance(clauses, dict):
+        clauses = [clauses]
+    values = []
+    for clause in clauses:
+        if field in clause.get("term", {}):
+            value = clause["term"][field]
+            values.append(value["value"] if isinstance(value, dict) else value)
+        elif field in clause.get("terms", {}):
+            values.extend(clause["terms"][field])
+    return values
+
+
+_layout = (0.0, {})
+
+
+# Раскладка текущей версии из _meta маппинга. Кэшируется ненадолго: после
+# переключения алиаса поиск подхватывает новую раскладку без перезапуска
+def current_layout(client: SearchClient) -> dict:
+    global _layout
+    checked, layout = _layout
+    if time.monotonic() - checked < LAYOUT_TTL:
+        return layout
+    r = client.get(f"{client.index}/_mapping")
+    layout = {}
+    if r.ok:
+        for mapping in r.json().values():
+            layout = mapping.get("mappings", {}).get("_meta", {}).get("layout") or {}
+            break
+    _layout = (time.monotonic(), layout)
+    return layout
+
+
+# Поле year появилось вместе с раскладкой в _meta: у версий до разбиения
+# (например, после --rollback) его нет, и фильтр по году отсёк бы всё.
+# Локальный поиск вычисляет year сам
+def year_filter_enabled(searcher) -> bool:
+    if not isinstance(searcher, SearchClient):
+        return True
+    return bool(current_layout(searcher))
+
+
+# Куда отправлять запрос: фильтр по году - только в алиасы нужных лет, фильтр
+# по категории - только в шард категории, если версия маршрутизирована по ней.
+# Версии без раскладки (до разбиения) и локальный поиск идут по всему алиасу
+def search_scope(body: dict, searcher) -> dict:
+    if not isinstance(searcher, SearchClient):
+        return {}
+    if not filter_values(body, "year") and not filter_values(body, "category"):
+        return {}
+    return scope_for(body, current_layout(searcher))
+
+
+def scope_for(body: dict, layout: dict) -> dict:
+    if not layout:
+        return {}
+    years = filter_values(body, "year")
+    categories = filter_values(body, "category")
+    scope = {}
+    if years:
+        scope["index"] = ",".join(year_alias(y) for y in years)
+        # Года без статей - пустой ответ, а не 404
+        scope["ignore_unavailable"] = "true"
+    if categories and layout.get("routing") == "category":
+        scope["routing"] = ",".join(categories)
+    return scope
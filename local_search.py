@@ -0,0 +1,561 @@
+import argparse
+import math
+import os
+import pickle
+import re
+import time
+from functools import lru_cache
+
+import numpy as np
+
+try:
+    import snowballstemmer
+except ImportError:
+    snowballstemmer = None
+
+from corpus_storage import iter_documents
+from dedupe import canonical_urls
+from index_layout import doc_year
+
+
+DATA_FILE = "src/storage/data_auto.jsonl"
+INDEX_CACHE = "src/storage/local_index.pkl"
+CACHE_VERSION = 3
+K1 = 1.2
+B = 0.75
+MAX_EXPANSIONS = 50
+
+TEXT_FIELDS = ("title", "text", "lead")
+NGRAM_FIELDS = ("title.ngram",)
+KEYWORD_FIELDS = ("category", "url", "site")
+NUMERIC_FIELDS = ("word_count", "year")
+
+# Стоп-слова Snowball для русского - тот же список, что _russian_ в OpenSearch
+RU_STOPWORDS = frozenset("""
+и в во не что он на я с со как а то все она так его но да ты к у же вы за бы по только ее мне было
+вот от меня еще нет о из ему теперь когда даже ну вдруг ли если уже или ни быть был него до вас
+нибудь опять уж вам ведь там потом себя ничего ей может они тут где есть надо ней для мы тебя их
+чем была сам чтоб без будто чего раз тоже себе под будет ж тогда кто этот того потому этого какой
+совсем ним здесь этом один почти мой тем чтобы нее сейчас были куда зачем всех никогда можно при
+наконец два об другой хоть после над больше тот через эти нас про всего них какая много разве три
+эту моя впрочем хорошо свою этой перед иногда лучше чуть том нельзя такой им более всегда конечно
+всю между
+""".split())
+
+TOKEN_RE = re.compile(r"\w+(?:[.,]\d+)*", re.UNICODE)
+NGRAM_RUN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def _require_stemmer():
+    if snowballstemmer is None:
+        raise RuntimeError("Для локального поиска нужен пакет snowballstemmer (pip install snowballstemmer)")
+
+
+_stemmer = None
+
+
+@lru_cache(maxsize=200_000)
+def stem(word: str) -> str:
+    global _stemmer
+    if _stemmer is None:
+        _require_stemmer()
+        _stemmer = snowballstemmer.stemmer("russian")
+    return _stemmer.stemWord(word)
+
+
+# Аналог ru_analyzer: standard -> lowercase -> стоп-слова -> snowball.
+# Позиции сохраняют дырки от стоп-слов, как в Lucene (важно для match_phrase)
+def analyze(text: str) -> list[tuple[int, str]]:
+    return [
+        (pos, stem(token))
+        for pos, token in enumerate(TOKEN_RE.findall(text.lower()))
+        if token not in RU_STOPWORDS
+    ]
+
+
+def trigrams(text: str) -> list[str]:
+    grams = []
+    for run in NGRAM_RUN_RE.findall(text.lower()):
+        grams.extend(run[i:i + 3] for i in range(len(run) - 2))
+    return grams
+
+
+def analyze_field(field: str, text: str) -> list[tuple[int, str]]:
+    if field in NGRAM_FIELDS:
+        return list(enumerate(trigrams(text)))
+    return analyze(text)
+
+
+def source_value(doc: dict, field: str) -> str:
+    return doc.get(field.split(".")[0]) or ""
+
+
+def fuzzy_distance(term: str) -> int:
+    # fuzziness: AUTO
+    return 0 if len(term) <= 2 else 1 if len(term) <= 5 else 2
+
+
+# Постинги одного поля: для каждого терма - документы, готовый BM25-вклад
+# (idf * tf-нормировка с длиной документа) и позиции для фразовых запросов
+class FieldIndex:
+    def __init__(self, n_docs: int, postings: dict, lengths: np.ndarray):
+        self.n_docs = n_docs
+        self.lengths = lengths
+        avgdl = float(lengths.mean()) if n_docs else 1.0
+        norm = K1 * (1 - B + B * lengths / max(avgdl, 1e-9))
+        self.terms: dict[str, tuple] = {}
+        for term, rows in postings.items():
+            docs = np.fromiter((d for d, _ in rows), dtype=np.int32, count=len(rows))
+            tf = np.fromiter((len(p) for _, p in rows), dtype=np.float32, count=len(rows))
+            offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum(tf)
+            positions = np.fromiter((x for _, p in rows for x in p), dtype=np.int32, count=int(offsets[-1]))
+            scores = (self.idf(len(rows)) * tf / (tf + norm[docs])).astype(np.float32)
+            self.terms[term] = (docs, scores, offsets, positions)
+        self._buckets = None
+
+    def idf(self, df: int) -> float:
+        return math.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+
+    def term_vector(self, term: str, boost: float = 1.0) -> tuple[np.ndarray, np.ndarray]:
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        mask = np.zeros(self.n_docs, dtype=bool)
+        posting = self.terms.get(term)
+        if posting is not None:
+            scores[posting[0]] = posting[1] * boost
+            mask[posting[0]] = True
+        return scores, mask
+
+    # Словарь поля, разложенный по длине терма в матрицы кодов символов: расстояние
+    # Дамерау-Левенштейна считается векторно сразу для всех термов нужной длины
+    def _length_buckets(self) -> dict[int, tuple[list[str], np.ndarray]]:
+        if self._buckets is None:
+            by_len: dict[int, list[str]] = {}
+            for term in self.terms:
+                by_len.setdefault(len(term), []).append(term)
+            self._buckets = {
+                n: (terms, np.array([[ord(c) for c in t] for t in terms], dtype=np.int32))
+                for n, terms in by_len.items()
+            }
+        return self._buckets
+
+    @lru_cache(maxsize=10_000)
+    def expand(self, term: str, max_edits: int) -> tuple[tuple[str, float], ...]:
+        if max_edits == 0:
+            return ((term, 1.0),) if term in self.terms else ()
+        q = np.array([ord(c) for c in term], dtype=np.int32)
+        m = len(q)
+        found = []
+        for n in range(max(1, m - max_edits), m + max_edits + 1):
+            bucket = self._length_buckets().get(n)
+            if bucket is None:
+                continue
+            terms, chars = bucket
+            v = len(terms)
+            prev2 = None
+            prev = np.tile(np.arange(n + 1, dtype=np.int32), (v, 1))
+            for i in range(1, m + 1):
+                cur = np.empty((v, n + 1), dtype=np.int32)
+                cur[:, 0] = i
+                for j in range(1, n + 1):
+                    cost = (chars[:, j - 1] != q[i - 1]).astype(np.int32)
+                    best = np.minimum(np.minimum(prev[:, j] + 1, cur[:, j - 1] + 1), prev[:, j - 1] + cost)
+                    if i > 1 and j > 1:
+                        swap = (chars[:, j - 1] == q[i - 2]) & (chars[:, j - 2] == q[i - 1])
+                        best = np.where(swap, np.minimum(best, prev2[:, j - 2] + 1), best)
+                    cur[:, j] = best
+                prev2, prev = prev, cur
+            for idx in np.nonzero(prev[:, n] <= max_edits)[0]:
+                dist = int(prev[idx, n])
+                # Как в Lucene FuzzyQuery: чем больше правок, тем меньше вес
+                found.append((terms[idx], 1.0 - dist / min(m, n)))
+        found.sort(key=lambda x: (-x[1], x[0]))
+        return tuple(found[:MAX_EXPANSIONS])
+
+    def phrase_vector(self, terms: list[tuple[int, str]], boost: float = 1.0) -> tuple[np.ndarray, np.ndarray]:
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        mask = np.zeros(self.n_docs, dtype=bool)
+        postings = [self.terms.get(t) for _, t in terms]
+        if not terms or any(p is None for p in postings):
+            return scores, mask
+        if len(terms) == 1:
+            return self.term_vector(terms[0][1], boost)
+
+        candidates = postings[0][0]
+        for p in postings[1:]:
+            candidates = np.intersect1d(candidates, p[0], assume_unique=True)
+        base = terms[0][0]
+        idf = sum(self.idf(len(p[0])) for p in postings)
+        for doc in candidates:
+            starts = None
+            for (pos, _), (docs, _, offsets, positions) in zip(terms, postings):
+                k = int(np.searchsorted(docs, doc))
+                doc_pos = positions[offsets[k]:offsets[k + 1]] - (pos - base)
+                starts = doc_pos if starts is None else np.intersect1d(starts, doc_pos, assume_unique=True)
+                if not len(starts):
+                    break
+            freq = len(starts)
+            if freq:
+                norm = K1 * (1 - B + B * self.lengths[doc] / max(float(self.lengths.mean()), 1e-9))
+                scores[doc] = idf * freq / (freq + norm) * boost
+                mask[doc] = True
+        return scores, mask
+
+
+def _build_postings(docs: list[dict], field: str):
+    postings: dict[str, list] = {}
+    lengths = np.zeros(len(docs), dtype=np.float32)
+    for i, doc in enumerate(docs):
+        tokens = analyze_field(field, source_value(doc, field))
+        lengths[i] = len(tokens)
+        per_doc: dict[str, list[int]] = {}
+        for pos, term in tokens:
+            per_doc.setdefault(term, []).append(pos)
+        for term, positions in per_doc.items():
+            postings.setdefault(term, []).append((i, positions))
+    return postings, lengths
+
+
+def _parse_fields(fields: list[str]) -> list[tuple[str, float]]:
+    parsed = []
+    for f in fields:
+        name, _, boost = f.partition("^")
+        parsed.append((name, float(boost) if boost else 1.0))
+    return parsed
+
+
+# Встроенная замена OpenSearch для разработки и оценки: BM25 поверх JSONL корпуса,
+# тот же анализ, что у ru_analyzer, и подмножество query DSL, которое строят
+# search_app и скрипты сбора (bool, multi_match, match, match_phrase, term, range)
+class LocalSearchEngine:
+    def __init__(self, docs: list[dict], synonyms: dict[str, list[list[str]]] | None = None):
+        _require_stemmer()
+        self.docs = docs
+        self.n_docs = len(docs)
+        self.fields: dict[str, FieldIndex] = {}
+        for field in TEXT_FIELDS + NGRAM_FIELDS:
+            postings, lengths = _build_postings(docs, field)
+            self.fields[field] = FieldIndex(self.n_docs, postings, lengths)
+        self.keywords = {
+            field: self._keyword_postings(field) for field in KEYWORD_FIELDS
+        }
+        self.numbers = {
+            field: np.array([float(d.get(field)) if d.get(field) is not None else np.nan for d in docs])
+            for field in NUMERIC_FIELDS
+        }
+        self.synonyms = synonyms or {}
+        self.stamp = None
+
+    def _keyword_postings(self, field: str) -> dict[str, np.ndarray]:
+        values: dict[str, list[int]] = {}
+        for i, doc in enumerate(self.docs):
+            if doc.get(field) is not None:
+                values.setdefault(str(doc[field]), []).append(i)
+        return {v: np.array(ids, dtype=np.int32) for v, ids in values.items()}
+
+    @classmethod
+    def from_corpus(cls, path: str = DATA_FILE, cache: str | None = INDEX_CACHE, dedupe: bool = True):
+        stamp = (CACHE_VERSION, os.path.abspath(path), _mtime(path), dedupe)
+        if cache and os.path.exists(cache):
+            try:
+                with open(cache, "rb") as f:
+                    cached_stamp, engine = pickle.load(f)
+                if cached_stamp == stamp:
+                    return engine
+            except (pickle.UnpicklingError, AttributeError, EOFError, ImportError):
+                pass
+
+        # В локальный индекс попадает то же, что index_data.py отправляет в OpenSearch
+        keep = canonical_urls(path)[0] if dedupe else None
+        docs = [d for d in iter_documents(path) if d.get("url") and (keep is None or d["url"] in keep)]
+        for doc in docs:
+            doc["year"] = doc_year(doc)
+        engine = cls(docs, load_synonym_rules())
+        engine.stamp = stamp
+        if cache:
+            os.makedirs(os.path.dirname(cache) or ".", exist_ok=True)
+            with open(cache, "wb") as f:
+                pickle.dump((stamp, engine), f, protocol=pickle.HIGHEST_PROTOCOL)
+        return engine
+
+    # Запрос -> группы позиций; у группы несколько вариантов (исходный терм и
+    # синонимы), вариант - набор термов. Так эмулируется synonym_graph
+    def _query_groups(self, field: str, text: str) -> list[list[list[str]]]:
+        if field in NGRAM_FIELDS:
+            return [[[g]] for g in trigrams(text)]
+        words = [w for w in TOKEN_RE.findall(text.lower())]
+        groups = []
+        i = 0
+        while i < len(words):
+            for size in (3, 2, 1):
+                phrase = " ".join(words[i:i + size])
+                if len(words) - i >= size and phrase in self.synonyms:
+                    alternatives = [[t for _, t in analyze(alt)] for alt in self.synonyms[phrase]]
+                    groups.append([a for a in alternatives if a])
+                    i += size
+                    break
+            else:
+                if words[i] not in RU_STOPWORDS:
+                    groups.append([[stem(words[i])]])
+                i += 1
+        return [g for g in groups if g]
+
+    def _field_match(self, field: str, text: str, operator: str, fuzziness, boost: float):
+        index = self.fields.get(field)
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        if index is None:
+            return scores, np.zeros(self.n_docs, dtype=bool)
+        groups = self._query_groups(field, text)
+        if not groups:
+            return scores, np.zeros(self.n_docs, dtype=bool)
+        mask = np.ones(self.n_docs, dtype=bool) if operator == "and" else np.zeros(self.n_docs, dtype=bool)
+        for group in groups:
+            g_scores = np.zeros(self.n_docs, dtype=np.float32)
+            g_mask = np.zeros(self.n_docs, dtype=bool)
+            for alternative in group:
+                a_scores = np.zeros(self.n_docs, dtype=np.float32)
+                a_mask = np.ones(self.n_docs, dtype=bool)
+                for term in alternative:
+                    t_scores, t_mask = self._term(index, term, fuzziness)
+                    a_scores += t_scores
+                    a_mask &= t_mask
+                np.maximum(g_scores, np.where(a_mask, a_scores, 0), out=g_scores)
+                g_mask |= a_mask
+            scores += g_scores
+            if operator == "and":
+                mask &= g_mask
+            else:
+                mask |= g_mask
+        return np.where(mask, scores * boost, 0).astype(np.float32), mask
+
+    def _term(self, index: FieldIndex, term: str, fuzziness):
+        if not fuzziness:
+            return index.term_vector(term)
+        max_edits = fuzzy_distance(term) if str(fuzziness).upper() == "AUTO" else int(fuzziness)
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        mask = np.zeros(self.n_docs, dtype=bool)
+        for expanded, weight in index.expand(term, max_edits):
+            e_scores, e_mask = index.term_vector(expanded, weight)
+            np.maximum(scores, e_scores, out=scores)
+            mask |= e_mask
+        return scores, mask
+
+    def _eval(self, query: dict) -> tuple[np.ndarray, np.ndarray]:
+        (kind, spec), = query.items()
+        handler = getattr(self, f"_q_{kind}", None)
+        if handler is None:
+            raise ValueError(f"Локальный поиск не поддерживает запрос {kind}")
+        return handler(spec)
+
+    def _q_match_all(self, spec: dict):
+        return np.full(self.n_docs, spec.get("boost", 1.0), dtype=np.float32), np.ones(self.n_docs, dtype=bool)
+
+    def _q_bool(self, spec: dict):
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        mask = np.ones(self.n_docs, dtype=bool)
+        for clause in _as_list(spec.get("must")):
+            s, m = self._eval(clause)
+            scores += s
+            mask &= m
+        for clause in _as_list(spec.get("filter")):
+            mask &= self._eval(clause)[1]
+
+        should = _as_list(spec.get("should"))
+        default_msm = 0 if spec.get("must") or spec.get("filter") else 1
+        msm = int(spec.get("minimum_should_match", default_msm if should else 0))
+        if should:
+            matched = np.zeros(self.n_docs, dtype=np.int32)
+            for clause in should:
+                s, m = self._eval(clause)
+                scores += s
+                matched += m
+            mask &= matched >= msm
+
+        for clause in _as_list(spec.get("must_not")):
+            mask &= ~self._eval(clause)[1]
+        return np.where(mask, scores * spec.get("boost", 1.0), 0).astype(np.float32), mask
+
+    def _q_multi_match(self, spec: dict):
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        mask = np.zeros(self.n_docs, dtype=bool)
+        # best_fields: балл документа - лучший из полей (tie_breaker = 0)
+        for field, field_boost in _parse_fields(spec.get("fields", list(TEXT_FIELDS))):
+            s, m = self._field_match(field, spec["query"], spec.get("operator", "or").lower(),
+                                     spec.get("fuzziness"), field_boost)
+            np.maximum(scores, s, out=scores)
+            mask |= m
+        return scores * spec.get("boost", 1.0), mask
+
+    def _q_match(self, spec: dict):
+        (field, params), = spec.items()
+        if not isinstance(params, dict):
+            params = {"query": params}
+        return self._field_match(field, str(params["query"]), params.get("operator", "or").lower(),
+                                 params.get("fuzziness"), params.get("boost", 1.0))
+
+    def _q_match_phrase(self, spec: dict):
+        (field, params), = spec.items()
+        if not isinstance(params, dict):
+            params = {"query": params}
+        index = self.fields.get(field)
+        if index is None:
+            return np.zeros(self.n_docs, dtype=np.float32), np.zeros(self.n_docs, dtype=bool)
+        return index.phrase_vector(analyze_field(field, str(params["query"])), params.get("boost", 1.0))
+
+    def _q_term(self, spec: dict):
+        (field, params), = spec.items()
+        if not isinstance(params, dict):
+            params = {"value": params}
+        return self._q_terms({field: [params["value"]], "boost": params.get("boost", 1.0)})
+
+    def _q_terms(self, spec: dict):
+        spec = dict(spec)
+        boost = spec.pop("boost", 1.0)
+        (field, values), = spec.items()
+        mask = np.zeros(self.n_docs, dtype=bool)
+        if field in self.numbers:
+            mask = np.isin(self.numbers[field], [float(v) for v in values])
+            return mask.astype(np.float32) * boost, mask
+        for value in values:
+            ids = self.keywords.get(field, {}).get(str(value))
+            if ids is not None:
+                mask[ids] = True
+        return mask.astype(np.float32) * boost, mask
+
+    def _q_range(self, spec: dict):
+        (field, bounds), = spec.items()
+        values = self.numbers.get(field)
+        if values is None:
+            raise ValueError(f"Локальный поиск: range только по числовым полям {NUMERIC_FIELDS}")
+        mask = ~np.isnan(values)
+        for op, cmp in (("gt", np.greater), ("gte", np.greater_equal), ("lt", np.less), ("lte", np.less_equal)):
+            if op in bounds:
+                mask &= cmp(np.nan_to_num(values), float(bounds[op]))
+        return mask.astype(np.float32) * bounds.get("boost", 1.0), mask
+
+    # Как SearchClient.msearch: ошибка запроса не прерывает остальные
+    def msearch(self, searches: list[tuple[dict, dict]], **_) -> list[dict]:
+        results = []
+        for body, params in searches:
+            try:
+                results.append(self.search(body, **params))
+            except (ValueError, KeyError, TypeError) as e:
+                results.append({"error": f"{type(e).__name__}: {e}"})
+        return results
+
+    # Для кэша поиска: индекс неизменен, пока не пересобран из другого корпуса
+    def generation(self) -> str:
+        return repr(self.stamp) if self.stamp else f"local:{id(self)}"
+
+    # Интерфейс как у SearchClient.search: ответ в формате OpenSearch
+    def search(self, body: dict, index: str | None = None, **params) -> dict:
+        start = time.perf_counter()
+        size = int(params.get("size", body.get("size", 10)))
+        offset = int(params.get("from", body.get("from", 0)))
+        scores, mask = self._eval(body.get("query", {"match_all": {}}))
+        matched = np.nonzero(mask)[0]
+        order = matched[np.lexsort((matched, -scores[matched]))][offset:offset + size]
+        hits = [{"_id": self.docs[i].get("url"), "_score": float(scores[i]), "_source": self.docs[i]} for i in order]
+        return {
+            "took": int((time.perf_counter() - start) * 1000),
+            "hits": {
+                "total": {"value": int(len(matched)), "relation": "eq"},
+                "max_score": float(scores[matched].max()) if len(matched) else None,
+                "hits": hits,
+            },
+        }
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _mtime(path: str) -> float:
+    if os.path.isdir(path):
+        return max((os.path.getmtime(os.path.join(path, n)) for n in os.listdir(path)), default=0.0)
+    return os.path.getmtime(path) if os.path.exists(path) else 0.0
+
+
+# Правила synonym_graph из index_data.py -> {фраза: [варианты]}
+def load_synonym_rules() -> dict[str, list[str]]:
+    from index_data import synonym_rules
+
+    synonyms = {}
+    for rule in synonym_rules():
+        left, right = rule.split("=>")
+        synonyms[left.strip()] = [t.strip() for t in right.split(",") if t.strip()]
+    return synonyms
+
+
+_engine = None
+
+
+def get_searcher(backend: str | None = None):
+    global _engine
+    backend = backend or os.environ.get("SEARCH_BACKEND", "opensearch")
+    if backend == "local":
+        if _engine is None:
+            _engine = LocalSearchEngine.from_corpus(os.environ.get("LOCAL_SEARCH_DATA", DATA_FILE))
+        return _engine
+    from opensearch_client import get_client
+
+    return get_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальный BM25-поиск по корпусу без OpenSearch")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_build = sub.add_parser("build", help="построить и закэшировать индекс")
+    p_build.add_argument("--data", default=DATA_FILE)
+    p_query = sub.add_parser("query", help="выполнить запрос как search_app")
+    p_query.add_argument("text")
+    p_query.add_argument("--data", default=DATA_FILE)
+    p_bench = sub.add_parser("bench", help="задержка на тестовых запросах скриптов сбора")
+    p_bench.add_argument("--data", default=DATA_FILE)
+    p_bench.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    # Через импорт модуля, а не __main__: иначе кэш не прочитается из search_app
+    from local_search import LocalSearchEngine as Engine
+
+    start = time.perf_counter()
+    engine = Engine.from_corpus(args.data)
+    print(f"Индекс: {engine.n_docs} документов, {time.perf_counter() - start:.1f} с")
+
+    if args.cmd == "query":
+        from search_app import build_query_body, load_spellfix, load_synonyms
+
+        body = build_query_body(args.text, load_synonyms(), load_spellfix())
+        for hit in engine.search(body, size=10)["hits"]["hits"]:
+            print(f"{hit['_score']:8.3f}  {hit['_source'].get('title')}")
+    elif args.cmd == "bench":
+        import collect_after_improvements
+        import collect_for_labeling
+        from search_app import build_query_body, load_spellfix, load_synonyms
+
+        synonyms, spellfix = load_synonyms(), load_spellfix()
+        builders = {
+            "search_app": lambda q: build_query_body(q, synonyms, spellfix),
+            "labeling": collect_for_labeling.build_query_body,
+            "after_improvements": collect_after_improvements.build_query_body,
+        }
+        print(f"{'построитель':<20} {'p50, мс':>8} {'p95, мс':>8} {'p99, мс':>8}")
+        for name, build in builders.items():
+            bodies = [build(q) for q in collect_for_labeling.TEST_QUERIES]
+            for body in bodies:
+                engine.search(body)
+            latencies = []
+            for _ in range(args.repeat):
+                for body in bodies:
+                    t = time.perf_counter()
+                    engine.search(body)
+                    latencies.append((time.perf_counter() - t) * 1000)
+            latencies.sort()
+            print(f"{name:<20} {latencies[len(latencies) // 2]:>8.3f} "
+                  f"{latencies[int(len(latencies) * 0.95)]:>8.3f} {latencies[int(len(latencies) * 0.99)]:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import gzip
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import urllib3
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+
+CONFIG_FILE = "opensearch.json"
+DEFAULTS = {
+    "url": "http://localhost:9200",
+    "user": "admin",
+    "password": "StrongPassw0rd!",
+    "index": "autoru_mag",
+    "timeout": 30.0,
+    "retries": 3,
+    "backoff": 0.5,
+    "pool_size": 16,
+    "gzip": True,
+    "verify": False,
+}
+# Переменные окружения переопределяют файл, файл - значения по умолчанию
+ENV_VARS = {
+    "url": "OPENSEARCH_URL",
+    "user": "OPENSEARCH_USER",
+    "password": "OPENSEARCH_PASSWORD",
+    "index": "OPENSEARCH_INDEX",
+    "timeout": "OPENSEARCH_TIMEOUT",
+    "retries": "OPENSEARCH_RETRIES",
+    "gzip": "OPENSEARCH_GZIP",
+}
+# Тела меньше этого не сжимаются: выигрыш меньше затрат
+GZIP_MIN_BYTES = 1024
+# Запросов в одном _msearch и пачек _msearch одновременно
+MSEARCH_BATCH = 100
+MSEARCH_PARALLEL = 4
+# Параметры поиска, которые в _msearch идут в заголовок, а не в тело запроса
+MSEARCH_HEADER_PARAMS = ("index", "routing", "ignore_unavailable", "preference", "request_cache")
+
+
+def load_config(path: str | None = None) -> dict:
+    config = dict(DEFAULTS)
+    path = path or os.environ.get("OPENSEARCH_CONFIG", CONFIG_FILE)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            config.update(json.load(f))
+    for key, var in ENV_VARS.items():
+        value = os.environ.get(var)
+        if value is None:
+            continue
+        default = DEFAULTS[key]
+        if isinstance(default, bool):
+            value = value.lower() not in ("0", "false", "no", "off", "")
+        elif isinstance(default, (int, float)):
+            value = type(default)(value)
+        config[key] = value
+    return config
+
+
+# [(тело, параметры поиска)] -> NDJSON для _msearch: заголовок с индексом и
+# маршрутизацией, затем тело; size/from переносятся в тело (копию)
+def msearch_payload(searches: list[tuple[dict, dict]], default_index: str) -> bytes:
+    lines = []
+    for body, params in searches:
+        header = {"index": params.get("index") or default_index}
+        header.update({k: params[k] for k in MSEARCH_HEADER_PARAMS[1:] if k in params})
+        body = {**body, **{k: params[k] for k in ("size", "from") if k in params}}
+        lines.append(json.dumps(header, ensure_ascii=False))
+        lines.append(json.dumps(body, ensure_ascii=False))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+# Ответ _msearch по порядку запросов; ошибка отдельного запроса - {"error": текст}
+def msearch_results(result: dict, n: int) -> list[dict]:
+    responses = result.get("responses") or []
+    if len(responses) != n:
+        return [{"error": f"_msearch вернул {len(responses)} ответов вместо {n}"}] * n
+    out = []
+    for response in responses:
+        error = response.get("error")
+        if error is None:
+            out.append(response)
+        elif isinstance(error, dict):
+            out.append({"error": f"{error.get('type')}: {error.get('reason')}", "status": response.get("status")})
+        else:
+            out.append({"error": str(error), "status": response.get("status")})
+    return out
+
+
+# Один клиент на процесс: пул keep-alive соединений, повторы с backoff на 5xx и
+# обрывах соединения, таймауты и gzip для тел запросов. Ответы requests
+# запрашивает сжатыми сам (Accept-Encoding: gzip)
+class SearchClient:
+    def __init__(self, config: dict | None = None):
+        self.config = config or load_config()
+        self.url = self.config["url"].rstrip("/")
+        self.index = self.config["index"]
+        self.timeout = self.config["timeout"]
+        self.gzip = self.config["gzip"]
+
+        retry = Retry(
+            total=self.config["retries"],
+            backoff_factor=self.config["backoff"],
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.config["pool_size"], max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if self.config.get("user"):
+            self.session.auth = (self.config["user"], self.config["password"])
+        self.session.verify = self.config["verify"]
+
+    def request(self, method: str, path: str, json_body=None, data: bytes | str | None = None,
+                params: dict | None = None, timeout: float | None = None,
+                content_type: str = "application/json") -> requests.Response:
+        headers = {}
+        if json_body is not None:
+            data = json.dumps(json_body, ensure_ascii=False)
+        if data is not None:
+            if isinstance(data, str):
+                data = data.encode("utf-8")
+            headers["Content-Type"] = content_type
+            if self.gzip and len(data) >= GZIP_MIN_BYTES:
+                data = gzip.compress(data, compresslevel=1)
+                headers["Content-Encoding"] = "gzip"
+        try:
+            return self.session.request(
+                method, f"{self.url}/{path.lstrip('/')}", data=data, params=params,
+                headers=headers, timeout=timeout or self.timeout,
+            )
+        except requests.exceptions.ConnectionError as e:
+            raise ConnectionError(f"OpenSearch недоступен на {self.url}: {e}") from e
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path: str, **kwargs) -> requests.Response:
+        return self.request("PUT", path, **kwargs)
+
+    def delete(self, path: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", path, **kwargs)
+
+    def head(self, path: str, **kwargs) -> requests.Response:
+        return self.request("HEAD", path, **kwargs)
+
+    def search(self, body: dict, index: str | None = None, **params) -> dict:
+        r = self.get(f"{index or self.index}/_search", json_body=body, params=params or None)
+        r.raise_for_status()
+        return r.json()
+
+    # Поколение данных за алиасом: меняется при переключении версии и при любой
+    # записи в неё (index_total растёт с каждым проиндексированным документом)
+    def generation(self, index: str | None = None) -> str:
+        r = self.get(f"{index or self.index}/_stats/indexing,docs", params={
+            "filter_path": "_all.primaries.indexing.index_total,_all.primaries.indexing.delete_total,"
+                           "indices.*.primaries.docs.count",
+        })
+        if r.status_code == 404:
+            return ""
+        r.raise_for_status()
+        stats = r.json()
+        indexing = stats.get("_all", {}).get("primaries", {}).get("indexing", {})
+        return (f"{','.join(sorted(stats.get('indices', {})))}:"
+                f"{indexing.get('index_total', 0)}:{indexing.get('delete_total', 0)}")
+
+    # Много запросов пачками по batch в _msearch, до parallel пачек одновременно.
+    # Ответы - в порядке searches; упавший запрос или целая пачка дают {"error": ...}
+    # на своих местах, остальные ответы не теряются
+    def msearch(self, searches: list[tuple[dict, dict]], batch: int = MSEARCH_BATCH,
+                parallel: int = MSEARCH_PARALLEL) -> list[dict]:
+        chunks = [searches[i:i + batch] for i in range(0, len(searches), batch)]
+        if len(chunks) <= 1:
+            return [r for chunk in chunks for r in self._msearch_chunk(chunk)]
+        with ThreadPoolExecutor(max_workers=max(1, min(parallel, len(chunks))), thread_name_prefix="msearch") as pool:
+            return [r for chunk in pool.map(self._msearch_chunk, chunks) for r in chunk]
+
+    # _msearch только читает, поэтому при перегрузке и обрыве его можно повторить
+    def _msearch_chunk(self, searches: list[tuple[dict, dict]]) -> list[dict]:
+        payload = msearch_payload(searches, self.index)
+        error = ""
+        for attempt in range(self.config["retries"] + 1):
+            if attempt:
+                time.sleep(self.config["backoff"] * 2 ** (attempt - 1))
+            try:
+                r = self.post("_msearch", data=payload, content_type="application/x-ndjson")
+            except (ConnectionError, requests.Timeout) as e:
+                error = str(e)
+                continue
+            if r.status_code in (429, 502, 503, 504):
+                error = f"HTTP {r.status_code}"
+                continue
+            if r.status_code >= 400:
+                return [{"error": f"HTTP {r.status_code}: {r.text[:200]}"}] * len(searches)
+            return msearch_results(r.json(), len(searches))
+        return [{"error": error}] * len(searches)
+
+    def bulk(self, payload: bytes, timeout: float | None = None) -> requests.Response:
+        return self.post("_bulk", data=payload, content_type="application/x-ndjson", timeout=timeout)
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> SearchClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = SearchClient()
+        return _client
+
+
+INDEX_NAME = load_config()["index"]
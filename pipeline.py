@@ -0,0 +1,184 @@
+import queue
+import threading
+import time
+
+
+_END = object()
+POLL = 0.2
+
+
+class StageStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.items_in = 0
+        self.items_out = 0
+        self.busy = 0.0
+        self.blocked_in = 0.0
+        self.blocked_out = 0.0
+
+    def add(self, **values):
+        with self.lock:
+            for name, value in values.items():
+                setattr(self, name, getattr(self, name) + value)
+
+
+# Стадия конвейера: workers потоков берут элементы из входной очереди, вызывают
+# fn(state, item) и кладут результат в выходную (None - элемент отброшен).
+# init() создаёт состояние потока (например, браузер), close(state) его освобождает
+class Stage:
+    def __init__(self, name: str, fn, workers: int = 1, queue_size: int = 16, init=None, close=None):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.init = init
+        self.close = close
+        self.stats = StageStats()
+        self.input: queue.Queue | None = None
+        self.output: queue.Queue | None = None
+        self._finished = 0
+        self._finished_lock = threading.Lock()
+
+
+# Стадии соединены ограниченными очередями: медленная стадия через заполненную
+# очередь притормаживает предыдущие (backpressure), а не копит элементы в памяти
+class Pipeline:
+    def __init__(self, stages: list[Stage]):
+        self.stages = stages
+        self.stop_event = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._started = None
+        self.errors: list[tuple[str, Exception]] = []
+
+        for stage in stages:
+            stage.input = queue.Queue(maxsize=stage.queue_size)
+        for stage, nxt in zip(stages, stages[1:]):
+            stage.output = nxt.input
+
+    def _put(self, q: queue.Queue | None, item) -> float:
+        if q is None:
+            return 0.0
+        start = time.perf_counter()
+        while True:
+            try:
+                q.put(item, timeout=POLL)
+                return time.perf_counter() - start
+            except queue.Full:
+                if self.stop_event.is_set() and item is not _END:
+                    return time.perf_counter() - start
+
+    def _run_worker(self, stage: Stage):
+        state = None
+        try:
+            try:
+                state = stage.init() if stage.init else None
+            except Exception as e:
+                self.errors.append((stage.name, e))
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = stage.input.get(timeout=POLL)
+                except queue.Empty:
+                    stage.stats.add(blocked_in=time.perf_counter() - start)
+                    continue
+                stage.stats.add(blocked_in=time.perf_counter() - start)
+
+                if item is _END:
+                    # Возвращаем маркер конца соседним потокам этой же стадии
+                    stage.input.put(_END)
+                    break
+                if self.stop_event.is_set():
+                    continue
+
+                start = time.perf_counter()
+                try:
+                    result = stage.fn(state, item)
+                except Exception as e:
+                    self.errors.append((stage.name, e))
+                    result = None
+                busy = time.perf_counter() - start
+
+                blocked = self._put(stage.output, result) if result is not None else 0.0
+                stage.stats.add(items_in=1, items_out=int(result is not None), busy=busy, blocked_out=blocked)
+        finally:
+            if stage.close and state is not None:
+                try:
+                    stage.close(state)
+                except Exception:
+                    pass
+            with stage._finished_lock:
+                stage._finished += 1
+                last = stage._finished == stage.workers
+            if last:
+                self._put(stage.output, _END)
+
+    def _feed(self, source):
+        first = self.stages[0]
+        for item in source:
+            if self.stop_event.is_set():
+                break
+            self._put(first.input, item)
+        self._put(first.input, _END)
+
+    def start(self, source):
+        self._started = time.perf_counter()
+        feeder = threading.Thread(target=self._feed, args=(source,), daemon=True, name="feed")
+        self._threads.append(feeder)
+        for stage in self.stages:
+            for i in range(stage.workers):
+                t = threading.Thread(target=self._run_worker, args=(stage,), daemon=True,
+                                     name=f"{stage.name}-{i}")
+                self._threads.append(t)
+        for t in self._threads:
+            t.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def join(self, timeout: float | None = None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for t in self._threads:
+            left = None if deadline is None else max(0.0, deadline - time.monotonic())
+            t.join(left)
+
+    def alive(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+    def run(self, source):
+        self.start(source)
+        try:
+            while self.alive():
+                time.sleep(POLL)
+        finally:
+            self.stop()
+            self.join(timeout=60)
+
+    def stats(self) -> list[dict]:
+        elapsed = max(time.perf_counter() - (self._started or time.perf_counter()), 1e-9)
+        rows = []
+        for stage in self.stages:
+            s = stage.stats
+            with s.lock:
+                rows.append({
+                    "stage": stage.name,
+                    "workers": stage.workers,
+                    "items": s.items_in,
+                    "items_per_sec": s.items_in / elapsed,
+                    "queue_depth": stage.input.qsize(),
+                    "queue_size": stage.queue_size,
+                    "busy_s": s.busy,
+                    "blocked_in_s": s.blocked_in,
+                    "blocked_out_s": s.blocked_out,
+                })
+        return rows
+
+    def format_stats(self) -> str:
+        lines = [f"{'стадия':<8} {'потоки':>6} {'элем.':>7} {'элем/с':>7} {'очередь':>9} "
+                 f"{'работа,с':>9} {'ждёт вход,с':>12} {'ждёт выход,с':>13}"]
+        for r in self.stats():
+            lines.append(
+                f"{r['stage']:<8} {r['workers']:>6} {r['items']:>7} {r['items_per_sec']:>7.2f} "
+                f"{r['queue_depth']:>4}/{r['queue_size']:<4} {r['busy_s']:>9.1f} "
+                f"{r['blocked_in_s']:>12.1f} {r['blocked_out_s']:>13.1f}"
+            )
+        return "\n".join(lines)
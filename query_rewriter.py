@@ -0,0 +1,141 @@
+from collections.abc import Iterable, Mapping
+from types import MappingProxyType
+
+
+def _word_char(c: str) -> bool:
+    return c.isalnum() or c == "_"
+
+
+# Автомат Ахо-Корасик по всем фразам словаря: один проход по запросу находит
+# все вхождения, сколько бы фраз ни было. Совпадение засчитывается только на
+# границах слов («авто» не находится внутри «автомобили»), из пересекающихся
+# выбирается самое левое, а из начинающихся там же - самое длинное
+class AhoCorasick:
+    def __init__(self, patterns: Iterable[str]):
+        self.goto: list[dict[str, int]] = [{}]
+        fail = [0]
+        own: list[tuple[int, ...]] = [()]
+        for pattern in patterns:
+            if not pattern:
+                continue
+            node = 0
+            for c in pattern:
+                nxt = self.goto[node].get(c)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][c] = nxt
+                    self.goto.append({})
+                    fail.append(0)
+                    own.append(())
+                node = nxt
+            if len(pattern) not in own[node]:
+                own[node] += (len(pattern),)
+
+        # Обход в ширину: суффиксная ссылка и все длины фраз, заканчивающихся в узле
+        self.fail = fail
+        self.outputs = list(own)
+        queue = list(self.goto[0].values())
+        for node in queue:
+            for c, nxt in self.goto[node].items():
+                f = fail[node]
+                while f and c not in self.goto[f]:
+                    f = fail[f]
+                fail[nxt] = self.goto[f].get(c, 0)
+                if self.outputs[fail[nxt]]:
+                    self.outputs[nxt] = own[nxt] + self.outputs[fail[nxt]]
+                queue.append(nxt)
+
+    def __len__(self) -> int:
+        return len(self.goto)
+
+    # (начало, конец) неперекрывающихся совпадений слева направо
+    def find(self, text: str) -> list[tuple[int, int]]:
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        longest: dict[int, int] = {}
+        node = 0
+        n = len(text)
+        for i, c in enumerate(text):
+            while node and c not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(c, 0)
+            if not outputs[node]:
+                continue
+            end = i + 1
+            if end < n and _word_char(text[end]):
+                continue
+            for length in outputs[node]:
+                start = end - length
+                if start > 0 and _word_char(text[start - 1]):
+                    continue
+                if longest.get(start, -1) < end:
+                    longest[start] = end
+
+        matches = []
+        last = 0
+        for start in sorted(longest):
+            if start >= last:
+                matches.append((start, longest[start]))
+                last = longest[start]
+        return matches
+
+
+# spellfix.json, скомпилированный один раз: замены за один проход по запросу
+class Spellfixer(Mapping):
+    def __init__(self, spellfix: Mapping[str, str]):
+        self.table = MappingProxyType({k.strip().lower(): v for k, v in spellfix.items() if k.strip()})
+        self.matcher = AhoCorasick(self.table)
+
+    def __getitem__(self, key: str) -> str:
+        return self.table[key]
+
+    def __iter__(self):
+        return iter(self.table)
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def apply(self, text: str) -> str:
+        parts = []
+        pos = 0
+        for start, end in self.matcher.find(text):
+            parts.append(text[pos:start])
+            parts.append(self.table[text[start:end]])
+            pos = end
+        if not parts:
+            return text
+        parts.append(text[pos:])
+        return "".join(parts)
+
+
+# synonyms.json как неизменяемая таблица: слово/фраза -> кортеж вариантов без повторов
+class SynonymTable(Mapping):
+    def __init__(self, synonyms: Mapping[str, list[str]]):
+        self.table = MappingProxyType({
+            k.strip().lower(): tuple(dict.fromkeys(v.strip().lower() for v in alternatives if v.strip()))
+            for k, alternatives in synonyms.items() if k.strip()
+        })
+        self.matcher = AhoCorasick(self.table)
+
+    def __getitem__(self, key: str) -> tuple[str, ...]:
+        return self.table[key]
+
+    def __iter__(self):
+        return iter(self.table)
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    # Токены запроса и их синонимы
+    def expand_tokens(self, text: str) -> list[str]:
+        expanded = set()
+        for token in text.split():
+            expanded.add(token)
+            expanded.update(self.table.get(token, ()))
+        return sorted(expanded)
+
+    # Синонимы всех фраз словаря, найденных в запросе
+    def phrase_expansions(self, text: str) -> list[str]:
+        used = set()
+        for start, end in self.matcher.find(text):
+            used.update(self.table[text[start:end]])
+        return sorted(used)
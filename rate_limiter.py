@@ -0,0 +1,61 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class _Bucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+
+# Token bucket на каждый хост с AIMD-регулировкой скорости: при ошибках скорость
+# умножается на decrease, после успешных запросов растёт на increase
+class HostRateLimiter:
+    def __init__(self, rate: float = 1.0, burst: float = 2.0, min_rate: float = 0.1,
+                 max_rate: float = 8.0, increase: float = 0.05, decrease: float = 0.5):
+        self.initial_rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self._buckets: dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, url: str) -> _Bucket:
+        host = urlsplit(url).netloc.lower()
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = _Bucket(self.initial_rate, self.burst)
+        return bucket
+
+    def acquire(self, url: str):
+        while True:
+            with self._lock:
+                bucket = self._bucket(url)
+                now = time.monotonic()
+                bucket.tokens = min(bucket.burst, bucket.tokens + (now - bucket.updated) * bucket.rate)
+                bucket.updated = now
+                if bucket.tokens >= 1.0:
+                    bucket.tokens -= 1.0
+                    return
+                wait = (1.0 - bucket.tokens) / bucket.rate
+            time.sleep(wait)
+
+    def on_success(self, url: str):
+        with self._lock:
+            bucket = self._bucket(url)
+            bucket.rate = min(self.max_rate, bucket.rate + self.increase)
+
+    def on_error(self, url: str):
+        with self._lock:
+            bucket = self._bucket(url)
+            bucket.rate = max(self.min_rate, bucket.rate * self.decrease)
+            bucket.tokens = min(bucket.tokens, 0.0)
+
+    def rate(self, url: str) -> float:
+        with self._lock:
+            return self._bucket(url).rate
@@ -0,0 +1,187 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+WINDOW = 300.0
+QUANTILES = (0.5, 0.95, 0.99)
+# Шаги обработки URL в порядке вывода сводки
+STEPS = ("rate_wait", "http", "browser_start", "navigate", "wait", "page_source", "parse", "write", "total")
+
+
+# Гистограмма длительностей: накопительные корзины для Prometheus и скользящее
+# окно последних WINDOW секунд для квантилей (видно, когда просела скорость)
+class Histogram:
+    def __init__(self, buckets=BUCKETS, window: float = WINDOW):
+        self.buckets = buckets
+        self.window = window
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.recent: deque[tuple[float, float]] = deque()
+
+    def observe(self, value: float, now: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.recent.append((now, value))
+        self._trim(now)
+
+    def _trim(self, now: float):
+        while self.recent and now - self.recent[0][0] > self.window:
+            self.recent.popleft()
+
+    def quantiles(self, now: float) -> dict[float, float]:
+        self._trim(now)
+        values = sorted(v for _, v in self.recent)
+        if not values:
+            return {q: 0.0 for q in QUANTILES}
+        return {q: values[min(len(values) - 1, int(q * len(values)))] for q in QUANTILES}
+
+
+class ScraperMetrics:
+    def __init__(self, window: float = WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._hist: dict[str, Histogram] = {}
+        self._counters: dict[tuple[str, str, str], int] = {}
+        self._started = time.monotonic()
+
+    def observe(self, step: str, seconds: float):
+        with self._lock:
+            hist = self._hist.get(step)
+            if hist is None:
+                hist = self._hist[step] = Histogram(window=self.window)
+            hist.observe(seconds, time.monotonic())
+
+    # Замер шага; если передан словарь timings - время копится и в разбивке по URL
+    @contextmanager
+    def timer(self, step: str, timings: dict | None = None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.observe(step, elapsed)
+            if timings is not None:
+                timings[step] = timings.get(step, 0.0) + elapsed
+
+    def inc(self, name: str, n: int = 1, **label):
+        key = (name, *next(iter(label.items()), ("", "")))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + n
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            steps = {
+                step: {
+                    "count": h.count,
+                    "sum_s": round(h.sum, 4),
+                    "max_s": round(h.max, 4),
+                    "window": {f"p{int(q * 100)}": round(v, 4) for q, v in h.quantiles(now).items()},
+                    "window_count": len(h.recent),
+                }
+                for step, h in self._hist.items()
+            }
+            counters: dict[str, dict | int] = {}
+            for (name, label, value), n in sorted(self._counters.items()):
+                if label:
+                    counters.setdefault(name, {})[value] = n
+                else:
+                    counters[name] = n
+        return {"uptime_s": round(now - self._started, 1), "window_s": self.window,
+                "steps": steps, "counters": counters}
+
+    def render_prometheus(self) -> str:
+        now = time.monotonic()
+        lines = [
+            "# HELP scraper_step_seconds Время шага обработки URL",
+            "# TYPE scraper_step_seconds histogram",
+        ]
+        with self._lock:
+            hists = sorted(self._hist.items())
+            for step, h in hists:
+                cumulative = 0
+                for bound, count in zip(h.buckets, h.counts):
+                    cumulative += count
+                    lines.append(f'scraper_step_seconds_bucket{{step="{step}",le="{bound}"}} {cumulative}')
+                lines.append(f'scraper_step_seconds_bucket{{step="{step}",le="+Inf"}} {h.count}')
+                lines.append(f'scraper_step_seconds_sum{{step="{step}"}} {h.sum:.6f}')
+                lines.append(f'scraper_step_seconds_count{{step="{step}"}} {h.count}')
+
+            lines.append(f"# HELP scraper_step_window_seconds Квантили за последние {self.window:g} с")
+            lines.append("# TYPE scraper_step_window_seconds gauge")
+            for step, h in hists:
+                for q, v in h.quantiles(now).items():
+                    lines.append(f'scraper_step_window_seconds{{step="{step}",quantile="{q}"}} {v:.6f}')
+
+            typed = set()
+            for (name, label, value), n in sorted(self._counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE scraper_{name}_total counter")
+                    typed.add(name)
+                labels = f'{{{label}="{value}"}}' if label else ""
+                lines.append(f"scraper_{name}_total{labels} {n}")
+        return "\n".join(lines) + "\n"
+
+    # Снимок пишется через временный файл, чтобы читатель не увидел половину JSON
+    def write_json(self, path: str):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/metrics.json"):
+                    body = json.dumps(metrics.snapshot(), ensure_ascii=False).encode("utf-8")
+                    content_type = "application/json; charset=utf-8"
+                elif self.path.startswith("/metrics"):
+                    body = metrics.render_prometheus().encode("utf-8")
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True, name="metrics").start()
+        return server
+
+    def format_summary(self) -> str:
+        snap = self.snapshot()
+        # Среднее, максимум и сумма - за весь запуск, квантили - за скользящее окно
+        lines = [f"{'шаг':<14} {'URL':>7} {'сред.,с':>8} {'p50,с':>7} {'p95,с':>7} {'p99,с':>7} "
+                 f"{'макс.,с':>8} {'всего,с':>9}   (квантили за {self.window:g} с)"]
+        order = [s for s in STEPS if s in snap["steps"]] + sorted(set(snap["steps"]) - set(STEPS))
+        for step in order:
+            s = snap["steps"][step]
+            w = s["window"]
+            lines.append(
+                f"{step:<14} {s['count']:>7} {s['sum_s'] / max(s['count'], 1):>8.3f} {w['p50']:>7.3f} "
+                f"{w['p95']:>7.3f} {w['p99']:>7.3f} {s['max_s']:>8.3f} {s['sum_s']:>9.1f}"
+            )
+        for name, value in snap["counters"].items():
+            if isinstance(value, dict):
+                value = ", ".join(f"{k}={v}" for k, v in sorted(value.items(), key=lambda kv: -kv[1]))
+            lines.append(f"{name}: {value}")
+        return "\n".join(lines)
@@ -1,15 +1,23 @@
+import argparse
+import os
 import re
 import json
 from pathlib import Path
-import requests
 
-ES_URL = "http://localhost:9200"
-INDEX_NAME = "autoru_mag"
-AUTH = ("admin", "StrongPassw0rd!")
+from index_layout import search_scope, year_filter_enabled
+from local_search import get_searcher
+from query_rewriter import Spellfixer, SynonymTable
+from search_cache import cached_search, get_cache
 
 
 SYNONYMS_FILE = Path("synonyms.json")
 SPELLFIX_FILE = Path("spellfix.json")
+# Синонимы раскрывает анализатор поиска в индексе (synonym_graph, index_data.py).
+# Старое раскрытие на клиенте - длинный OR с fuzziness - включается явно
+CLIENT_SYNONYMS = os.environ.get("CLIENT_SYNONYMS", "0") == "1"
+# При раскрытии на клиенте запрос анализируется без synonym_graph -
+# иначе синонимы раскрылись бы второй раз уже в индексе
+PLAIN_ANALYZER = "ru_analyzer"
 
 
 def load_json_file(file_path: Path) -> dict:
@@ -25,34 +33,32 @@ def load_json_file(file_path: Path) -> dict:
         return {}
 
 
-def normalize_text(text: str) -> str:
-    return re.sub(r"\s+", " ", text.strip().lower())
+def load_spellfix(file_path: Path = SPELLFIX_FILE) -> Spellfixer:
+    return Spellfixer(load_json_file(file_path))
 
 
-def apply_spellfix(text: str, spellfix: dict[str, str]) -> str:
-    if not isinstance(text, str):
-        return text
+def load_synonyms(file_path: Path = SYNONYMS_FILE) -> SynonymTable:
+    return SynonymTable(load_json_file(file_path))
 
-    fixed_text = text
-    phrases = sorted(spellfix.keys(), key=len, reverse=True)
 
-    for phrase in phrases:
-        if phrase in fixed_text:
-            fixed_text = fixed_text.replace(phrase, spellfix[phrase])
-
-    return fixed_text
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text.strip().lower())
 
 
-def expand_synonyms(text: str, synonyms: dict[str, list[str]]) -> list[str]:
-    tokens = normalize_text(text).split()
-    expanded = []
+# Словари компилируются один раз (load_spellfix/load_synonyms); обычный dict
+# тоже принимается, но тогда автомат строится на каждый вызов
+def apply_spellfix(text: str, spellfix: Spellfixer | dict[str, str]) -> str:
+    if not isinstance(text, str):
+        return text
+    if not isinstance(spellfix, Spellfixer):
+        spellfix = Spellfixer(spellfix)
+    return spellfix.apply(text)
 
-    for token in tokens:
-        expanded.append(token)
-        if token in synonyms:
-            expanded.extend(synonyms[token])
 
-    return sorted(set(expanded))
+def expand_synonyms(text: str, synonyms: SynonymTable | dict[str, list[str]]) -> list[str]:
+    if not isinstance(synonyms, SynonymTable):
+        synonyms = SynonymTable(synonyms)
+    return synonyms.expand_tokens(normalize_text(text))
 
 
 def build_synonym_query(q: str, synonyms: dict) -> str | None:
@@ -65,34 +71,48 @@ def build_synonym_query(q: str, synonyms: dict) -> str | None:
     return " ".join(expanded_tokens)
 
 
-def build_query_body(q: str, synonyms: dict, spellfix: dict) -> dict:
+def build_query_body(q: str, synonyms: dict, spellfix: dict, client_synonyms: bool = CLIENT_SYNONYMS,
+                     category: str | None = None, year_filter: bool = True) -> dict:
 
     q_norm = normalize_text(q)
     q_fixed = apply_spellfix(q_norm, spellfix)
 
 
-    syn_q = build_synonym_query(q_fixed, synonyms)
+    syn_q = build_synonym_query(q_fixed, synonyms) if client_synonyms else None
+
+    # Год в запросе и категория - фильтры, а не баллы: кэшируются на узле и
+    # сужают поиск до разделов этого года (index_layout.search_scope).
+    # Без поля year в индексе (year_filter=False) год, как раньше, - баллы за заголовок
+    filters = []
+    year_match = re.search(r'\b(202[4-7])\b', q_fixed)
+    filter_year = year_match if year_filter else None
+    if filter_year:
+        filters.append({"term": {"year": int(filter_year.group(1))}})
+    if category:
+        filters.append({"term": {"category": category}})
+    # Год уже в фильтре - в тексте статьи его не требуем
+    q_text = normalize_text(q_fixed.replace(filter_year.group(1), "")) if filter_year else q_fixed
 
     fields = ["title^4", "text"]
+    analyzer = {"analyzer": PLAIN_ANALYZER} if client_synonyms else {}
     should_queries = []
 
     should_queries.append({
         "multi_match": {
-            "query": q_fixed,
+            "query": q_text or q_fixed,
             "fields": fields,
             "operator": "and",
             "fuzziness": "AUTO",
-            "boost": 2.0
+            "boost": 2.0,
+            **analyzer
         }
     })
 
-    year_match = re.search(r'\b(202[4-7])\b', q_fixed)
-    if year_match:
-        year = year_match.group(1)
+    if year_match and not filter_year:
         should_queries.append({
             "match_phrase": {
                 "title": {
-                    "query": year,
+                    "query": year_match.group(1),
                     "boost": 5.0
                 }
             }
@@ -125,14 +145,13 @@ def build_query_body(q: str, synonyms: dict, spellfix: dict) -> dict:
                 "fields": fields,
                 "operator": "or",
                 "fuzziness": "AUTO",
-                "boost": 1.8
+                "boost": 1.8,
+                **analyzer
             }
         })
 
-    must_not = [
-        {"match_phrase": {"title": "Главное за день"}},
-        {"match_phrase": {"title": "главное за день"}}
-    ]
+    # Дайджесты «Главное за день» отсекаются при индексации (dedupe.py)
+    must_not = []
 
     # Умные исключения
     if any(word in q_fixed for word in ['снижение', 'падение', 'дешевеет']):
@@ -165,30 +184,42 @@ def build_query_body(q: str, synonyms: dict, spellfix: dict) -> dict:
             "bool": {
                 "should": should_queries,
                 "minimum_should_match": 1,
-                "must_not": must_not
+                "must_not": must_not,
+                "filter": filters
             }
         }
     }
 
 
-def es_search(query: str, synonyms: dict, spellfix: dict, size: int = 30):
-    body = build_query_body(query, synonyms, spellfix)
-    r = requests.get(
-        f"{ES_URL}/{INDEX_NAME}/_search",
-        json=body,
-        auth=AUTH,
-        params={"size": size},
-    )
-    r.raise_for_status()
-    return r.json()
+def es_search(query: str, synonyms: dict, spellfix: dict, size: int = 30,
+              client_synonyms: bool = CLIENT_SYNONYMS, backend: str | None = None, category: str | None = None):
+    searcher = get_searcher(backend)
+    body = build_query_body(query, synonyms, spellfix, client_synonyms, category, year_filter_enabled(searcher))
+    return cached_search(searcher, body, size=size, **search_scope(body, searcher))
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Интерактивный поиск по статьям auto.ru/mag")
+    parser.add_argument("--client-synonyms", action="store_true", default=CLIENT_SYNONYMS,
+                        help="раскрывать синонимы на клиенте, а не анализатором индекса")
+    parser.add_argument("--backend", choices=("opensearch", "local"), default=None,
+                        help="где искать: OpenSearch или локальный BM25 по корпусу (по умолчанию SEARCH_BACKEND)")
+    parser.add_argument("--category", help="искать только в категории (например, «Новости»)")
+    parser.add_argument("--serve", action="store_true", help="запустить HTTP-сервис (search_service.py) вместо консоли")
+    parser.add_argument("--port", type=int, default=8080, help="порт HTTP-сервиса")
+    args = parser.parse_args()
+
+    if args.serve:
+        from search_service import serve
+
+        serve(port=args.port, backend=args.backend or os.environ.get("SEARCH_BACKEND", "opensearch"))
+        return
+
     print("=== Auto.ru Search (Enhanced) ===")
     print("Синонимы + Исправления опечаток + Умный поиск")
 
-    synonyms = load_json_file(SYNONYMS_FILE)
-    spellfix = load_json_file(SPELLFIX_FILE)
+    synonyms = load_synonyms()
+    spellfix = load_spellfix()
 
     print(f"Загружено синонимов: {len(synonyms)}")
     print(f"Загружено исправлений: {len(spellfix)}")
@@ -199,7 +230,8 @@ def main():
             break
 
         try:
-            resp = es_search(q, synonyms, spellfix, size=30)
+            resp = es_search(q, synonyms, spellfix, size=30, client_synonyms=args.client_synonyms,
+                             backend=args.backend, category=args.category)
             hits = resp.get("hits", {}).get("hits", [])
 
             if not hits:
@@ -221,6 +253,8 @@ def main():
         except Exception as e:
             print(f"Ошибка поиска: {e}")
 
+    print(get_cache().format_stats())
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,240 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+CACHE_SIZE = int(os.environ.get("SEARCH_CACHE_SIZE", "1024"))
+CACHE_TTL = float(os.environ.get("SEARCH_CACHE_TTL", "300"))
+# Общий слой между процессами: путь к sqlite-файлу или redis://host:6379/0. Пусто - только память
+SHARED_CACHE = os.environ.get("SEARCH_CACHE_SHARED", "")
+# Поколение индекса проверяется не чаще раза в несколько секунд, а не на каждый запрос
+GENERATION_CHECK = 5.0
+PURGE_EVERY = 200
+
+
+def _require_redis():
+    if redis is None:
+        raise RuntimeError("Для кэша в Redis нужен пакет redis (pip install redis)")
+
+
+def cache_key(searcher, body: dict, params: dict) -> str:
+    payload = json.dumps({"backend": type(searcher).__name__, "body": body, "params": params},
+                         ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+# Запись: (поколение, срок годности, время исходного запроса в мс, ответ)
+class SqliteLayer:
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache "
+            "(key TEXT PRIMARY KEY, generation TEXT, expires REAL, took_ms REAL, response TEXT)"
+        )
+        self.lock = threading.Lock()
+        self.writes = 0
+
+    def get(self, key: str):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT generation, expires, took_ms, response FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        generation, expires, took_ms, response = row
+        return generation, expires, took_ms, json.loads(response)
+
+    def set(self, key: str, generation: str, expires: float, took_ms: float, response: dict):
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO search_cache VALUES (?, ?, ?, ?, ?)",
+                (key, generation, expires, took_ms, json.dumps(response, ensure_ascii=False)),
+            )
+            self.writes += 1
+            if self.writes % PURGE_EVERY == 0:
+                self.db.execute("DELETE FROM search_cache WHERE expires < ?", (time.time(),))
+
+
+class RedisLayer:
+    def __init__(self, url: str):
+        _require_redis()
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key: str):
+        raw = self.client.get(f"search:{key}")
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        return entry["generation"], entry["expires"], entry["took_ms"], entry["response"]
+
+    def set(self, key: str, generation: str, expires: float, took_ms: float, response: dict):
+        entry = {"generation": generation, "expires": expires, "took_ms": took_ms, "response": response}
+        # Redis сам удаляет запись по истечении TTL
+        ttl = max(1, int(expires - time.time()))
+        self.client.set(f"search:{key}", json.dumps(entry, ensure_ascii=False), ex=ttl)
+
+
+def shared_layer(spec: str):
+    if not spec:
+        return None
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisLayer(spec)
+    return SqliteLayer(spec)
+
+
+# Двухуровневый кэш перед поиском: LRU в памяти процесса и общий слой (sqlite
+# или Redis) для разных процессов и повторных запусков скриптов сбора.
+# Ключ - тело запроса (уже нормализованное и с исправленными опечатками) и
+# параметры. Запись живёт ttl секунд и не отдаётся, если за алиасом сменилась
+# версия индекса или в неё что-то записали (generation у поискового клиента)
+class SearchCache:
+    def __init__(self, maxsize: int = CACHE_SIZE, ttl: float = CACHE_TTL, shared: str = SHARED_CACHE):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared = shared_layer(shared)
+        self._memory: OrderedDict[str, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+        self._generations: dict[int, tuple[float, str]] = {}
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.saved_ms = 0.0
+        self.search_ms = 0.0
+
+    def generation(self, searcher) -> str:
+        checked, generation = self._generations.get(id(searcher), (0.0, ""))
+        if time.monotonic() - checked >= GENERATION_CHECK:
+            generation = searcher.generation()
+            self._generations[id(searcher)] = (time.monotonic(), generation)
+        return generation
+
+    def _fresh(self, entry, generation: str) -> bool:
+        if entry is None:
+            return False
+        if entry[0] != generation or entry[1] < time.time():
+            self.stale += 1
+            return False
+        return True
+
+    # get/put отдельно - для асинхронного сервиса, который сам получает поколение и ответ
+    def get(self, key: str, generation: str) -> dict | None:
+        start = time.perf_counter()
+        with self._lock:
+            entry = self._memory.get(key)
+            if self._fresh(entry, generation):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                self.saved_ms += max(0.0, entry[2] - (time.perf_counter() - start) * 1000)
+                return entry[3]
+
+        if self.shared is not None:
+            entry = self.shared.get(key)
+            if self._fresh(entry, generation):
+                self._remember(key, entry)
+                with self._lock:
+                    self.shared_hits += 1
+                    self.saved_ms += max(0.0, entry[2] - (time.perf_counter() - start) * 1000)
+                return entry[3]
+        return None
+
+    def put(self, key: str, generation: str, took_ms: float, response: dict):
+        entry = (generation, time.time() + self.ttl, took_ms, response)
+        self._remember(key, entry)
+        if self.shared is not None:
+            self.shared.set(key, *entry)
+        with self._lock:
+            self.misses += 1
+            self.search_ms += took_ms
+
+    def search(self, searcher, body: dict, **params) -> dict:
+        key = cache_key(searcher, body, params)
+        generation = self.generation(searcher)
+        cached = self.get(key, generation)
+        if cached is not None:
+            return cached
+        start = time.perf_counter()
+        response = searcher.search(body, **params)
+        self.put(key, generation, (time.perf_counter() - start) * 1000, response)
+        return response
+
+    # Пакет запросов: из кэша - что есть, промахи одним searcher.msearch
+    def msearch(self, searcher, searches: list[tuple[dict, dict]]) -> list[dict]:
+        generation = self.generation(searcher)
+        keys = [cache_key(searcher, body, params) for body, params in searches]
+        responses = [self.get(key, generation) for key in keys]
+        missing = [i for i, response in enumerate(responses) if response is None]
+        if missing:
+            start = time.perf_counter()
+            fetched = searcher.msearch([searches[i] for i in missing])
+            took_ms = (time.perf_counter() - start) * 1000 / len(missing)
+            for i, response in zip(missing, fetched):
+                responses[i] = response
+                if "error" not in response:
+                    self.put(keys[i], generation, took_ms, response)
+        return responses
+
+    def _remember(self, key: str, entry: tuple):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.shared_hits + self.misses
+        return {
+            "requests": total,
+            "memory_hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "hit_rate": (self.hits + self.shared_hits) / total if total else 0.0,
+            "saved_ms": round(self.saved_ms, 1),
+            "search_ms": round(self.search_ms, 1),
+            "entries": len(self._memory),
+        }
+
+    def format_stats(self) -> str:
+        s = self.stats()
+        return (f"Кэш поиска: запросов {s['requests']}, попаданий {s['hit_rate']:.0%} "
+                f"(память {s['memory_hits']}, общий {s['shared_hits']}), промахов {s['misses']}, "
+                f"устаревших {s['stale']}; сэкономлено {s['saved_ms'] / 1000:.2f} с "
+                f"при {s['search_ms'] / 1000:.2f} с на поиск")
+
+
+_cache = None
+
+
+def get_cache() -> SearchCache:
+    global _cache
+    if _cache is None:
+        _cache = SearchCache()
+    return _cache
+
+
+def cached_search(searcher, body: dict, **params) -> dict:
+    if os.environ.get("SEARCH_CACHE", "1") == "0":
+        return searcher.search(body, **params)
+    return get_cache().search(searcher, body, **params)
+
+
+def cached_msearch(searcher, searches: list[tuple[dict, dict]]) -> list[dict]:
+    if os.environ.get("SEARCH_CACHE", "1") == "0":
+        return searcher.msearch(searches)
+    return get_cache().msearch(searcher, searches)
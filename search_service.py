@@ -0,0 +1,399 @@
+import argparse
+import asyncio
+import gzip
+import json
+import time
+
+import aiohttp
+from aiohttp import web
+
+from index_layout import scope_for
+from opensearch_client import GZIP_MIN_BYTES, load_config, msearch_payload, msearch_results
+from search_app import CLIENT_SYNONYMS, build_query_body, load_spellfix, load_synonyms
+from search_cache import GENERATION_CHECK, SearchCache, cache_key
+
+
+HOST = "127.0.0.1"
+PORT = 8080
+# Одновременных запросов к OpenSearch; остальные ждут не дольше QUEUE_TIMEOUT и получают 503
+MAX_IN_FLIGHT = 32
+QUEUE_TIMEOUT = 2.0
+MAX_SIZE = 100
+MAX_MSEARCH = 50
+SOURCE_FIELDS = ["title", "url", "category", "date", "lead"]
+
+
+class UpstreamError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# Асинхронный аналог SearchClient: тот же конфиг, пул keep-alive соединений
+# aiohttp, gzip для больших тел и повтор на обрыв соединения и 502/503/504
+class AsyncSearchClient:
+    def __init__(self, config: dict | None = None):
+        self.config = config or load_config()
+        self.url = self.config["url"].rstrip("/")
+        self.index = self.config["index"]
+        self.session = None
+
+    async def open(self):
+        connector = aiohttp.TCPConnector(limit=self.config["pool_size"], ssl=None if self.config["verify"] else False)
+        auth = aiohttp.BasicAuth(self.config["user"], self.config["password"]) if self.config.get("user") else None
+        self.session = aiohttp.ClientSession(
+            connector=connector, auth=auth, timeout=aiohttp.ClientTimeout(total=self.config["timeout"]),
+        )
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+
+    async def request(self, method: str, path: str, json_body=None, data: bytes | None = None,
+                      params: dict | None = None, content_type: str = "application/json"):
+        headers = {}
+        if json_body is not None:
+            data = json.dumps(json_body, ensure_ascii=False).encode("utf-8")
+        if data is not None:
+            headers["Content-Type"] = content_type
+            if self.config["gzip"] and len(data) >= GZIP_MIN_BYTES:
+                data = gzip.compress(data, compresslevel=1)
+                headers["Content-Encoding"] = "gzip"
+        params = {k: str(v) for k, v in (params or {}).items()}
+        url = f"{self.url}/{path.lstrip('/')}"
+        for attempt in range(self.config["retries"] + 1):
+            if attempt:
+                await asyncio.sleep(self.config["backoff"] * 2 ** (attempt - 1))
+            try:
+                async with self.session.request(method, url, data=data, params=params, headers=headers) as r:
+                    if r.status in (502, 503, 504) and attempt < self.config["retries"]:
+                        continue
+                    try:
+                        return r.status, await r.json(content_type=None)
+                    except (json.JSONDecodeError, UnicodeDecodeError, aiohttp.ContentTypeError) as e:
+                        # Страница ошибки прокси или балансировщика вместо ответа OpenSearch
+                        raise UpstreamError(502, f"OpenSearch ответил {r.status} не в JSON: {e}") from e
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt == self.config["retries"]:
+                    raise UpstreamError(502, f"OpenSearch недоступен на {self.url}: {e}") from e
+
+    async def search(self, body: dict, index: str | None = None, **params) -> dict:
+        status, result = await self.request("GET", f"{index or self.index}/_search", json_body=body, params=params)
+        if status >= 400:
+            raise UpstreamError(502, f"OpenSearch ответил {status}: {json.dumps(result, ensure_ascii=False)[:300]}")
+        return result
+
+    # [(тело, параметры поиска)] -> ответы в том же порядке, одним запросом _msearch
+    async def msearch(self, searches: list[tuple[dict, dict]]) -> list[dict]:
+        payload = msearch_payload(searches, self.index)
+        status, result = await self.request("POST", "_msearch", data=payload, content_type="application/x-ndjson")
+        if status >= 400:
+            raise UpstreamError(502, f"OpenSearch ответил {status} на _msearch")
+        return msearch_results(result, len(searches))
+
+    async def generation(self) -> str:
+        status, stats = await self.request("GET", f"{self.index}/_stats/indexing,docs", params={
+            "filter_path": "_all.primaries.indexing.index_total,_all.primaries.indexing.delete_total,"
+                           "indices.*.primaries.docs.count",
+        })
+        if status >= 400:
+            return ""
+        indexing = stats.get("_all", {}).get("primaries", {}).get("indexing", {})
+        return (f"{','.join(sorted(stats.get('indices', {})))}:"
+                f"{indexing.get('index_total', 0)}:{indexing.get('delete_total', 0)}")
+
+    async def layout(self) -> dict:
+        status, mappings = await self.request("GET", f"{self.index}/_mapping")
+        if status >= 400:
+            return {}
+        for mapping in mappings.values():
+            return mapping.get("mappings", {}).get("_meta", {}).get("layout") or {}
+        return {}
+
+    async def health(self) -> dict:
+        status, health = await self.request("GET", "_cluster/health")
+        return {"status": health.get("status", "unknown") if status < 400 else "unreachable"}
+
+
+# Локальный BM25 (local_search.py) в пуле потоков - без OpenSearch
+class LocalBackend:
+    def __init__(self):
+        from local_search import get_searcher
+
+        self.engine = get_searcher("local")
+
+    async def open(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def search(self, body: dict, index: str | None = None, **params) -> dict:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: self.engine.search(body, **params))
+
+    # Ошибка одного запроса - {"error": ...} на его месте, как в ответе _msearch
+    async def msearch(self, searches: list[tuple[dict, dict]]) -> list[dict]:
+        results = await asyncio.gather(*(self.search(body, **params) for body, params in searches),
+                                       return_exceptions=True)
+        return [
+            {"error": f"{type(r).__name__}: {r}", "status": 500} if isinstance(r, Exception) else r
+            for r in results
+        ]
+
+    async def generation(self) -> str:
+        return self.engine.generation()
+
+    async def layout(self) -> dict:
+        return {}
+
+    async def health(self) -> dict:
+        return {"status": "green", "docs": self.engine.n_docs}
+
+
+# Заглушка для нагрузочных тестов самого сервиса: фиксированная задержка и пустой ответ
+class StubBackend:
+    def __init__(self, latency_ms: float = 10.0):
+        self.latency = latency_ms / 1000
+
+    async def open(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def search(self, body: dict, index: str | None = None, **params) -> dict:
+        await asyncio.sleep(self.latency)
+        return {"took": int(self.latency * 1000), "hits": {"total": {"value": 0, "relation": "eq"}, "hits": []}}
+
+    async def msearch(self, searches: list[tuple[dict, dict]]) -> list[dict]:
+        await asyncio.sleep(self.latency)
+        return [{"took": int(self.latency * 1000), "hits": {"total": {"value": 0, "relation": "eq"}, "hits": []}}
+                for _ in searches]
+
+    async def generation(self) -> str:
+        return "stub"
+
+    async def layout(self) -> dict:
+        return {}
+
+    async def health(self) -> dict:
+        return {"status": "green"}
+
+
+def http_error(error_class, message: str) -> web.HTTPException:
+    return error_class(text=json.dumps({"error": message}, ensure_ascii=False), content_type="application/json")
+
+
+def make_backend(name: str, stub_latency_ms: float = 10.0):
+    if name == "local":
+        return LocalBackend()
+    if name == "stub":
+        return StubBackend(stub_latency_ms)
+    return AsyncSearchClient()
+
+
+def compact_hits(response: dict) -> dict:
+    hits = response.get("hits", {})
+    return {
+        "total": hits.get("total", {}).get("value", 0),
+        "hits": [
+            {"score": h.get("_score"), **{f: h.get("_source", {}).get(f) for f in SOURCE_FIELDS}}
+            for h in hits.get("hits", [])
+        ],
+    }
+
+
+# HTTP-сервис поиска: словари загружаются один раз, запросы строит
+# search_app.build_query_body, ответы кэшируются (search_cache.py), а к
+# OpenSearch одновременно уходит не больше max_in_flight запросов
+class SearchService:
+    def __init__(self, backend, max_in_flight: int = MAX_IN_FLIGHT, cache: SearchCache | None = None):
+        self.backend = backend
+        self.max_in_flight = max_in_flight
+        self.cache = cache
+        self.synonyms = load_synonyms()
+        self.spellfix = load_spellfix()
+        self.generation = ""
+        self.layout = {}
+        self.in_flight = 0
+        self.rejected = 0
+        self.errors = 0
+        self.started = time.time()
+        self._limit = None
+        self._refresher = None
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/search", self.handle_search)
+        app.router.add_post("/search", self.handle_search)
+        app.router.add_post("/msearch", self.handle_msearch)
+        app.router.add_get("/health", self.handle_health)
+        app.on_startup.append(self._startup)
+        app.on_cleanup.append(self._cleanup)
+        return app
+
+    async def _startup(self, app):
+        self._limit = asyncio.Semaphore(self.max_in_flight)
+        await self.backend.open()
+        await self._refresh()
+        self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def _cleanup(self, app):
+        self._refresher.cancel()
+        await self.backend.close()
+
+    # Поколение индекса и раскладка обновляются в фоне, а не на каждый запрос
+    async def _refresh(self):
+        try:
+            self.generation = await self.backend.generation()
+            self.layout = await self.backend.layout()
+        except UpstreamError:
+            pass
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(GENERATION_CHECK)
+            await self._refresh()
+
+    def prepare(self, params: dict) -> tuple[str, dict, dict]:
+        if not isinstance(params.get("category") or "", str):
+            raise http_error(web.HTTPBadRequest, "category - строка")
+        q = str(params.get("q") or "").strip()
+        if not q:
+            raise http_error(web.HTTPBadRequest, "пустой запрос q")
+        try:
+            size = min(MAX_SIZE, max(1, int(params.get("size") or 10)))
+        except (TypeError, ValueError):
+            raise http_error(web.HTTPBadRequest, "size - целое число")
+        client_synonyms = str(params.get("client_synonyms", int(CLIENT_SYNONYMS))) in ("1", "true", "True")
+        # Фильтр по году - только если в версии за алиасом есть поле year (index_layout.year_filter_enabled)
+        year_filter = bool(self.layout) or not isinstance(self.backend, AsyncSearchClient)
+        body = build_query_body(q, self.synonyms, self.spellfix, client_synonyms, params.get("category") or None,
+                                year_filter)
+        return q, body, {"size": size, **scope_for(body, self.layout)}
+
+    # Слот в пределах лимита; не дождался за QUEUE_TIMEOUT - 503, а не растущая очередь
+    async def _acquire(self):
+        try:
+            await asyncio.wait_for(self._limit.acquire(), QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise http_error(web.HTTPServiceUnavailable, "поиск перегружен")
+        self.in_flight += 1
+
+    def _release(self):
+        self.in_flight -= 1
+        self._limit.release()
+
+    # call() создаёт корутину только после получения слота: при 503 её не остаётся неожиданной
+    async def _upstream(self, call):
+        await self._acquire()
+        try:
+            return await call()
+        except UpstreamError as e:
+            self.errors += 1
+            raise http_error(web.HTTPBadGateway, str(e))
+        finally:
+            self._release()
+
+    @staticmethod
+    async def _json(request: web.Request) -> dict:
+        try:
+            body = await request.json()
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            raise http_error(web.HTTPBadRequest, "тело запроса - не JSON")
+        if not isinstance(body, dict):
+            raise http_error(web.HTTPBadRequest, "тело запроса - JSON-объект")
+        return body
+
+    async def _params(self, request: web.Request) -> dict:
+        params = dict(request.query)
+        if request.method == "POST" and request.can_read_body:
+            params.update(await self._json(request))
+        return params
+
+    async def handle_search(self, request: web.Request) -> web.Response:
+        start = time.perf_counter()
+        q, body, params = self.prepare(await self._params(request))
+        key = cache_key(self.backend, body, params)
+        response = self.cache.get(key, self.generation) if self.cache else None
+        cached = response is not None
+        if not cached:
+            response = await self._upstream(lambda: self.backend.search(body, **params))
+            if self.cache:
+                self.cache.put(key, self.generation, (time.perf_counter() - start) * 1000, response)
+        return web.json_response(
+            {"query": q, "cached": cached, "took_ms": round((time.perf_counter() - start) * 1000, 2),
+             **compact_hits(response)},
+            dumps=lambda obj: json.dumps(obj, ensure_ascii=False),
+        )
+
+    # {"queries": [{"q": ..., "size": ..., "category": ...}, ...]} - промахи кэша уходят одним _msearch
+    async def handle_msearch(self, request: web.Request) -> web.Response:
+        start = time.perf_counter()
+        queries = (await self._json(request)).get("queries") or []
+        if not isinstance(queries, list) or not all(isinstance(params, dict) for params in queries):
+            raise http_error(web.HTTPBadRequest, "queries - список объектов")
+        if len(queries) > MAX_MSEARCH:
+            raise http_error(web.HTTPBadRequest, f"не больше {MAX_MSEARCH} запросов")
+        prepared = [self.prepare(params) for params in queries]
+        keys = [cache_key(self.backend, body, params) for _, body, params in prepared]
+        responses = [self.cache.get(key, self.generation) if self.cache else None for key in keys]
+        missing = [i for i, r in enumerate(responses) if r is None]
+        if missing:
+            fetched = await self._upstream(lambda: self.backend.msearch([prepared[i][1:] for i in missing]))
+            took_ms = (time.perf_counter() - start) * 1000 / len(missing)
+            for i, response in zip(missing, fetched):
+                responses[i] = response
+                if self.cache and "error" not in response:
+                    self.cache.put(keys[i], self.generation, took_ms, response)
+        results = [
+            {"query": q, "cached": i not in missing, **(compact_hits(r) if "error" not in r else {"error": r["error"]})}
+            for i, ((q, _, _), r) in enumerate(zip(prepared, responses))
+        ]
+        return web.json_response(
+            {"took_ms": round((time.perf_counter() - start) * 1000, 2), "responses": results},
+            dumps=lambda obj: json.dumps(obj, ensure_ascii=False),
+        )
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        try:
+            upstream = await asyncio.wait_for(self.backend.health(), QUEUE_TIMEOUT)
+        except (UpstreamError, asyncio.TimeoutError):
+            upstream = {"status": "unreachable"}
+        return web.json_response({
+            "status": "ok" if upstream["status"] in ("green", "yellow") else "degraded",
+            "upstream": upstream,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "rejected": self.rejected,
+            "upstream_errors": self.errors,
+            "generation": self.generation,
+            "uptime_s": round(time.time() - self.started),
+            "cache": self.cache.stats() if self.cache else None,
+        })
+
+
+def serve(host: str = HOST, port: int = PORT, backend: str = "opensearch", max_in_flight: int = MAX_IN_FLIGHT,
+          stub_latency_ms: float = 10.0, cache: bool = True):
+    service = SearchService(make_backend(backend, stub_latency_ms), max_in_flight, SearchCache() if cache else None)
+    print(f"Поиск на http://{host}:{port} (бэкенд: {backend}, одновременно к бэкенду: {max_in_flight})")
+    web.run_app(service.app(), host=host, port=port, access_log=None, print=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP-сервис поиска: /search, /msearch, /health")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--backend", choices=("opensearch", "local", "stub"), default="opensearch")
+    parser.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT,
+                        help="одновременных запросов к бэкенду")
+    parser.add_argument("--stub-latency-ms", type=float, default=10.0, help="задержка бэкенда stub")
+    parser.add_argument("--no-cache", action="store_true", help="без кэша результатов")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.backend, args.max_in_flight, args.stub_latency_ms, not args.no_cache)
+
+
+if __name__ == "__main__":
+    main()
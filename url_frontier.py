@@ -0,0 +1,314 @@
+import argparse
+import gzip
+import os
+import re
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+import requests
+from dateutil.parser import parse as dtparse
+
+
+FRONTIER_DB = "src/storage/frontier.sqlite"
+SITE_ROOT = "https://auto.ru"
+ARTICLE_RE = re.compile(r"^https://auto\.ru/mag/article/[^/?#]+$")
+LINK_RE = re.compile(r'href="([^"#]*/mag/article/[^"#?]+)', re.I)
+TRACKING_PARAMS = re.compile(r"^(utm_\w+|from|yclid|gclid|fbclid|_openstat)$", re.I)
+SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+# SKIPPED (страница не статья или слишком короткая) - конечное состояние.
+# Не загрузившийся URL (таймаут, 5xx, сломанная сессия) возвращается в очередь
+# с растущей паузой и только после MAX_ATTEMPTS неудач становится FAILED;
+# такие URL возвращает в очередь команда requeue-failed
+PENDING, LEASED, DONE, SKIPPED, FAILED = 0, 1, 2, 3, 4
+MAX_ATTEMPTS = 5
+RETRY_BACKOFF = 600.0
+
+
+def normalize_url(url: str, base: str | None = None) -> str:
+    if base:
+        url = urljoin(base, url)
+    parts = urlsplit(url.strip())
+    scheme = "https" if parts.scheme in ("http", "https", "") else parts.scheme.lower()
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = re.sub(r"/{2,}", "/", parts.path or "/")
+    if len(path) > 1:
+        path = path.rstrip("/")
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if not TRACKING_PARAMS.match(k)))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+# Фронтир обхода: нормализация URL, дедупликация по первичному ключу SQLite,
+# выдача по приоритету (свежий lastmod - раньше)
+class UrlFrontier:
+    def __init__(self, db_path: str = FRONTIER_DB):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS frontier (
+                url TEXT PRIMARY KEY,
+                priority REAL NOT NULL DEFAULT 0,
+                lastmod TEXT,
+                source TEXT,
+                status INTEGER NOT NULL DEFAULT 0,
+                added REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                retry_after REAL NOT NULL DEFAULT 0
+            )
+            """
+        )
+        # Фронтир, созданный до счётчика попыток
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(frontier)")}
+        if "attempts" not in columns:
+            self._db.execute("ALTER TABLE frontier ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+            self._db.execute("ALTER TABLE frontier ADD COLUMN retry_after REAL NOT NULL DEFAULT 0")
+        self._db.execute("CREATE INDEX IF NOT EXISTS frontier_next ON frontier(status, priority DESC)")
+        self._db.commit()
+
+    # Известные URL отсеивает сам INSERT OR IGNORE: одна вставка на порцию,
+    # новых - сколько строк реально добавилось
+    def add_many(self, entries, source: str, batch: int = 1000) -> int:
+        added = 0
+        now = time.time()
+        rows = {}
+        for url, lastmod in entries:
+            url = normalize_url(url)
+            if ARTICLE_RE.match(url) and url not in rows:
+                rows[url] = (url, lastmod_priority(lastmod), lastmod, source, now)
+            if len(rows) >= batch:
+                added += self._insert(rows.values())
+                rows.clear()
+        if rows:
+            added += self._insert(rows.values())
+        return added
+
+    def _insert(self, rows) -> int:
+        with self._lock:
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO frontier (url, priority, lastmod, source, added) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._db.commit()
+            return self._db.total_changes - before
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM frontier").fetchone()[0]
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM frontier WHERE status IN (?, ?)", (PENDING, LEASED)
+            ).fetchone()[0]
+
+    def counts(self) -> dict[str, int]:
+        names = {PENDING: "pending", LEASED: "leased", DONE: "done", SKIPPED: "skipped", FAILED: "failed"}
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM frontier GROUP BY status").fetchall()
+        return {names.get(status, str(status)): n for status, n in rows}
+
+    # URL, уже лежащие в хранилище (например, скачанные до перехода на фронтир),
+    # закрываются до старта конвейера, чтобы не ходить за ними повторно
+    def mark_stored(self, store, batch: int = 1000) -> int:
+        with self._lock:
+            urls = [r[0] for r in self._db.execute(
+                "SELECT url FROM frontier WHERE status IN (?, ?)", (PENDING, LEASED)
+            )]
+        stored = 0
+        for i in range(0, len(urls), batch):
+            done = [(DONE, u) for u in urls[i:i + batch] if u in store]
+            if done:
+                with self._lock:
+                    self._db.executemany("UPDATE frontier SET status = ? WHERE url = ?", done)
+                    self._db.commit()
+                stored += len(done)
+        return stored
+
+    # Незавершённые аренды возвращаются в очередь: при остановке (URL, выданные
+    # после набора цели или застрявшие в очередях конвейера) и после падения
+    def reset_leases(self):
+        with self._lock:
+            self._db.execute("UPDATE frontier SET status = ? WHERE status = ?", (PENDING, LEASED))
+            self._db.commit()
+
+    def lease(self, n: int) -> list[str]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT url FROM frontier WHERE status = ? AND retry_after <= ? ORDER BY priority DESC LIMIT ?",
+                (PENDING, time.time(), n),
+            ).fetchall()
+            urls = [r[0] for r in rows]
+            self._db.executemany("UPDATE frontier SET status = ? WHERE url = ?", [(LEASED, u) for u in urls])
+            self._db.commit()
+        return urls
+
+    def mark_done(self, url: str, status: int = DONE):
+        with self._lock:
+            self._db.execute("UPDATE frontier SET status = ? WHERE url = ?", (status, normalize_url(url)))
+            self._db.commit()
+
+    # Неудачная загрузка: пауза перед следующей попыткой удваивается
+    def mark_failed(self, url: str, max_attempts: int = MAX_ATTEMPTS) -> bool:
+        url = normalize_url(url)
+        with self._lock:
+            row = self._db.execute("SELECT attempts FROM frontier WHERE url = ?", (url,)).fetchone()
+            attempts = (row[0] if row else 0) + 1
+            failed = attempts >= max_attempts
+            self._db.execute(
+                "UPDATE frontier SET status = ?, attempts = ?, retry_after = ? WHERE url = ?",
+                (FAILED if failed else PENDING, attempts, time.time() + RETRY_BACKOFF * 2 ** (attempts - 1), url),
+            )
+            self._db.commit()
+        return failed
+
+    def requeue_failed(self) -> int:
+        with self._lock:
+            n = self._db.execute(
+                "UPDATE frontier SET status = ?, attempts = 0, retry_after = 0 WHERE status = ?", (PENDING, FAILED)
+            ).rowcount
+            self._db.commit()
+        return n
+
+    # Ленивый поток URL по приоритету: в памяти только текущая порция
+    def iter_pending(self, batch: int = 256):
+        self.reset_leases()
+        while True:
+            urls = self.lease(batch)
+            if not urls:
+                return
+            yield from urls
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def lastmod_priority(lastmod: str | None) -> float:
+    if not lastmod:
+        return 0.0
+    try:
+        return dtparse(lastmod).timestamp()
+    except (ValueError, OverflowError):
+        return 0.0
+
+
+def fetch_bytes(session: requests.Session, url: str) -> bytes | None:
+    try:
+        r = session.get(url, timeout=20)
+    except requests.RequestException as e:
+        print(f"[WARN] {url}: {e}")
+        return None
+    if r.status_code != 200:
+        print(f"[WARN] {url}: HTTP {r.status_code}")
+        return None
+    data = r.content
+    if data[:2] == b"\x1f\x8b":
+        data = gzip.decompress(data)
+    return data
+
+
+def robots_sitemaps(session: requests.Session, root: str = SITE_ROOT) -> list[str]:
+    data = fetch_bytes(session, root.rstrip("/") + "/robots.txt")
+    if not data:
+        return []
+    return [
+        line.split(":", 1)[1].strip()
+        for line in data.decode("utf-8", errors="replace").splitlines()
+        if line.lower().startswith("sitemap:")
+    ]
+
+
+# Обходит sitemap index рекурсивно, отдаёт (url, lastmod) из всех urlset
+def iter_sitemap(session: requests.Session, url: str, only: str | None = "mag", seen: set | None = None):
+    seen = set() if seen is None else seen
+    if url in seen:
+        return
+    seen.add(url)
+    data = fetch_bytes(session, url)
+    if not data:
+        return
+    try:
+        root = ET.fromstring(data)
+    except ET.ParseError as e:
+        print(f"[WARN] {url}: {e}")
+        return
+
+    if root.tag == f"{SITEMAP_NS}sitemapindex":
+        for sm in root.iter(f"{SITEMAP_NS}sitemap"):
+            loc = sm.findtext(f"{SITEMAP_NS}loc")
+            if loc and (only is None or only in loc):
+                yield from iter_sitemap(session, loc.strip(), only, seen)
+        return
+
+    for node in root.iter(f"{SITEMAP_NS}url"):
+        loc = node.findtext(f"{SITEMAP_NS}loc")
+        if loc:
+            yield loc.strip(), node.findtext(f"{SITEMAP_NS}lastmod")
+
+
+# Страницы-списки (рубрики, ленты) с шаблоном {page}, например .../mag/theme/news/?page={page}
+def iter_listing(session: requests.Session, template: str, pages: int):
+    for page in range(1, pages + 1):
+        url = template.format(page=page)
+        data = fetch_bytes(session, url)
+        if not data:
+            break
+        links = LINK_RE.findall(data.decode("utf-8", errors="replace"))
+        if not links:
+            break
+        for link in links:
+            yield normalize_url(link, base=url), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Фронтир URL статей auto.ru/mag")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_sitemaps = sub.add_parser("sitemaps", help="найти статьи через robots.txt/sitemap")
+    p_sitemaps.add_argument("--sitemap", action="append", default=None,
+                            help="явный sitemap (по умолчанию - из robots.txt)")
+    p_listing = sub.add_parser("listing", help="собрать ссылки со страниц-списков")
+    p_listing.add_argument("template", help="URL с {page}")
+    p_listing.add_argument("--pages", type=int, default=50)
+    p_seed = sub.add_parser("seed", help="загрузить URL из текстового файла")
+    p_seed.add_argument("path", nargs="?", default="urls_auto.txt")
+    sub.add_parser("stats", help="размер фронтира")
+    sub.add_parser("requeue-failed", help="вернуть в очередь URL, исчерпавшие попытки загрузки")
+
+    args = parser.parse_args()
+    frontier = UrlFrontier()
+    session = requests.Session()
+    session.headers["User-Agent"] = "Mozilla/5.0 (compatible; autoru-mag-frontier)"
+    try:
+        if args.cmd == "sitemaps":
+            sitemaps = args.sitemap or robots_sitemaps(session)
+            print(f"Sitemap-файлов в robots.txt: {len(sitemaps)}")
+            for sm in sitemaps:
+                added = frontier.add_many(iter_sitemap(session, sm), source="sitemap")
+                print(f"  {sm}: новых URL {added}")
+        elif args.cmd == "listing":
+            added = frontier.add_many(iter_listing(session, args.template, args.pages), source="listing")
+            print(f"Новых URL: {added}")
+        elif args.cmd == "requeue-failed":
+            print(f"Возвращено в очередь: {frontier.requeue_failed()}")
+        elif args.cmd == "seed":
+            with open(args.path, "r", encoding="utf-8") as f:
+                added = frontier.add_many(((line.strip(), None) for line in f if line.strip()), source="file")
+            print(f"Новых URL: {added}")
+        print(f"Всего во фронтире: {len(frontier)}, не обработано: {frontier.pending()}")
+        print("По состояниям: " + ", ".join(f"{k} {v}" for k, v in sorted(frontier.counts().items())))
+    finally:
+        frontier.close()
+
+
+if __name__ == "__main__":
+    main()